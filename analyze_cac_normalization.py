@@ -4,6 +4,12 @@ Analyze CAC/CACIT normalization results
 """
 
 import re
+import os
+import sys
+
+# The match type rules live with the Cloud Function source
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cloud_function_deploy'))
+from match_types import classify_match_type
 
 def analyze_cac_normalization():
     """Analyze if CAC/CACIT normalization worked correctly"""
@@ -91,6 +97,18 @@ def analyze_cac_normalization():
     print(f"\n📊 VELDWEDSTRIJD ANALYSIS:")
     print(f"   Matches with type 'Veldwedstrijd': {veldwedstrijd_count}")
     
+    # Re-classify every scraped type: a normalized type must classify to itself
+    unnormalized = [
+        (match_type, cal_type)
+        for match_type, cal_type in zip(type_matches, calendar_type_matches)
+        if classify_match_type(match_type, cal_type)[0] != match_type
+    ]
+    
+    print(f"\n🔍 RE-CLASSIFICATION CHECK:")
+    print(f"   Types that still normalize differently: {len(unnormalized)}")
+    for match_type, cal_type in sorted(set(unnormalized))[:5]:
+        print(f"     - {match_type} ({cal_type}) -> {classify_match_type(match_type, cal_type)[0]}")
+    
     # Calendar type distribution
     calendar_counts = {}
     for cal_type in calendar_type_matches:
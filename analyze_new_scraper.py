@@ -6,6 +6,13 @@ Analyze the new scraper results and show improvements
 import json
 import re
 from collections import defaultdict
+import os
+import sys
+
+# The shared cell cleaner and fuzzy index live with the Cloud Function source
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cloud_function_deploy'))
+from cell_cleaner import clean_escaped_text
+from fuzzy_index import FuzzyIndex, trigram_similarity
 
 def analyze_new_scraper():
     """Analyze the new scraper results from the updated_scraper_response.json"""
@@ -236,48 +243,37 @@ def analyze_data_quality(tier2_data):
 
 def clean_text(text):
     """Clean text by removing escape characters and normalizing whitespace"""
-    if not text:
-        return ""
-    
-    # Remove escape characters and email artifacts
-    text = text.replace('\\\\', '')
-    text = re.sub(r'\\[email.*?protected\\]', '', text)
-    text = re.sub(r'\\u00[a-fA-F0-9]{2}', '', text)
-    text = re.sub(r'\\s+', ' ', text)
-    return text.strip()
+    return clean_escaped_text(text)
 
 def find_duplicates(matches):
-    """Find potential duplicate matches"""
+    """Find potential duplicate matches (same date, organizer or location over 0.8 similar)"""
     duplicates = []
     
-    # Group by date
-    by_date = defaultdict(list)
-    for match in matches:
-        by_date[match.get('date', '')].append(match)
+    cleaned = [(clean_text(match.get('organizer', '')), clean_text(match.get('location', ''))) for match in matches]
+    
+    # Trigram indexes give the similar organizers/locations of a match without comparing all pairs
+    organizers = FuzzyIndex()
+    locations = FuzzyIndex()
+    for i, (org, loc) in enumerate(cleaned):
+        organizers.add(org, i)
+        locations.add(loc, i)
+    
+    pairs = set()
+    for i, (org, loc) in enumerate(cleaned):
+        candidates = organizers.query(org, k=None, min_score=0.8) + locations.query(loc, k=None, min_score=0.8)
+        for _, j in candidates:
+            if j > i and matches[j].get('date', '') == matches[i].get('date', ''):
+                pairs.add((i, j))
     
-    for date, date_matches in by_date.items():
-        if len(date_matches) > 1:
-            # Check for duplicates within the same date
-            for i, match1 in enumerate(date_matches):
-                for j, match2 in enumerate(date_matches[i+1:], i+1):
-                    org1 = clean_text(match1.get('organizer', ''))
-                    org2 = clean_text(match2.get('organizer', ''))
-                    loc1 = clean_text(match1.get('location', ''))
-                    loc2 = clean_text(match2.get('location', ''))
-                    
-                    # Check for high similarity
-                    from difflib import SequenceMatcher
-                    org_sim = SequenceMatcher(None, org1.lower(), org2.lower()).ratio()
-                    loc_sim = SequenceMatcher(None, loc1.lower(), loc2.lower()).ratio()
-                    
-                    if org_sim > 0.8 or loc_sim > 0.8:
-                        duplicates.append({
-                            'date': date,
-                            'match1': match1,
-                            'match2': match2,
-                            'org_similarity': org_sim,
-                            'loc_similarity': loc_sim
-                        })
+    for i, j in sorted(pairs):
+        (org1, loc1), (org2, loc2) = cleaned[i], cleaned[j]
+        duplicates.append({
+            'date': matches[i].get('date', ''),
+            'match1': matches[i],
+            'match2': matches[j],
+            'org_similarity': trigram_similarity(org1, org2),
+            'loc_similarity': trigram_similarity(loc1, loc2)
+        })
     
     return duplicates
 
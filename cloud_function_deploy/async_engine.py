@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Async scrape engine
+asyncio variant of the tier-2 pipeline on aiohttp and the async Firestore client
+
+Login, calendar fetches, optional detail fetches and Firestore writes all
+run on one event loop: each calendar goes fetch -> parse -> (enrich) ->
+write as soon as its page arrives, so the writes of the fastest calendar
+overlap with the downloads of the slowest one instead of waiting for a
+whole stage to finish.
+
+Selected with {"engine": "async"} or SCRAPER_ENGINE=async. Returns the
+same scrape result as main.run_tier2_scrape() (plus the 'sync' stats), so the
+function's JSON summary is identical for both engines.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+from google.cloud import firestore
+from yarl import URL
+
+import main as sync_engine
+from detail_enricher import (
+    ENRICH_MAX_WORKERS,
+    ENRICH_RATE_PER_HOST,
+    parse_detail_page,
+    _load_cached_details,
+    _store_cached_details,
+)
+from orweja_transport import (
+    BACKOFF_MAX,
+    CONNECT_TIMEOUT,
+    MAX_RETRIES,
+    READ_TIMEOUT,
+    RETRY_STATUS_CODES,
+    USER_AGENT,
+    CircuitBreaker,
+    backoff_delay,
+)
+from change_feed import change_record, emit_changes
+from match_sync import (
+    MATCHES_COLLECTION,
+    add_sync_stats,
+    collect_retired_matches,
+    diff_matches,
+    fold_staged_matches,
+    hold_generation,
+    load_generation_pointer,
+    new_sync_stats,
+    publish_generation,
+    staged_update,
+)
+from scraper_state import clear_state, save_state
+
+# Concurrent Firestore mutations in flight
+FIRESTORE_WRITE_CONCURRENCY = int(os.environ.get('FIRESTORE_WRITE_CONCURRENCY', '20'))
+
+class HTTPStatusError(Exception):
+    """4xx/5xx response, raised by FetchedPage.raise_for_status()"""
+
+    def __init__(self, status_code, url):
+        super().__init__(f"HTTP {status_code} for {url}")
+        self.status_code = status_code
+        self.url = url
+
+class FetchedPage:
+    """Fully read HTTP response, shaped like the bits of requests.Response we use"""
+
+    def __init__(self, status_code, url, headers, content):
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPStatusError(self.status_code, self.url)
+
+class AsyncOrwejaClient:
+    """aiohttp session with the same retry and circuit breaker policy as OrwejaSession"""
+
+    max_retries = MAX_RETRIES
+
+    def __init__(self, session):
+        self.session = session
+        self.breaker = CircuitBreaker()
+        self.request_count = 0
+        self.retry_count = 0
+
+    async def request(self, method, url, **kwargs):
+        host = urlparse(url).netloc
+        idempotent = method.upper() in ('GET', 'HEAD', 'OPTIONS')
+
+        attempt = 0
+        while True:
+            self.breaker.before_request(host)
+            self.request_count += 1
+
+            error = None
+            page = None
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    page = FetchedPage(response.status, str(response.url), response.headers, await response.read())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+
+            if page is not None:
+                if page.status_code not in RETRY_STATUS_CODES:
+                    self.breaker.record_success(host)
+                    return page
+                self.breaker.record_failure(host)
+                if not idempotent or attempt >= self.max_retries:
+                    return page
+            else:
+                self.breaker.record_failure(host)
+                if not idempotent or attempt >= self.max_retries:
+                    raise error
+
+            delay = backoff_delay(attempt)
+            if page is not None:
+                reason = f"HTTP {page.status_code}"
+                retry_after = page.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = min(BACKOFF_MAX, float(retry_after))
+            else:
+                reason = type(error).__name__
+
+            attempt += 1
+            self.retry_count += 1
+            print(f"🔁 Retry {attempt}/{self.max_retries} for {url} in {delay:.2f}s ({reason})")
+            await asyncio.sleep(delay)
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    def stats(self):
+        return {
+            'requests': self.request_count,
+            'retries': self.retry_count
+        }
+
+class AsyncHostRateLimiter:
+    """asyncio counterpart of detail_enricher.HostRateLimiter"""
+
+    def __init__(self, rate_per_second=ENRICH_RATE_PER_HOST):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0
+        self._next_slot = {}
+
+    async def wait(self, url):
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def _restore_cookies(jar, cached_session):
+    """Copy the cookies of the cached requests session into the aiohttp jar"""
+    for cookie in cached_session.cookies:
+        domain = cookie.domain.lstrip('.') or urlparse(sync_engine.ORWEJA_CHECK_URL).netloc
+        jar.update_cookies({cookie.name: cookie.value}, response_url=URL(f"https://{domain}{cookie.path or '/'}"))
+
+def _save_cookies(jar):
+    """Store the aiohttp cookies in the same format as main.save_session_cache()"""
+    cookies = [
+        {
+            'name': morsel.key,
+            'value': morsel.value,
+            'domain': morsel['domain'],
+            'path': morsel['path'] or '/',
+            'expires': None,
+            'secure': bool(morsel['secure'])
+        }
+        for morsel in jar
+    ]
+    if save_state(sync_engine.db, sync_engine.ORWEJA_SESSION_STATE_KEY, {'cookies': cookies, 'saved_at': time.time()}):
+        print(f"💾 Cached ORWEJA session ({len(cookies)} cookies)")
+
+async def open_orweja_session_async(client):
+    """Async counterpart of main.open_orweja_session(), returns the check page body or None"""
+    cached_session = await asyncio.to_thread(sync_engine.load_cached_session)
+    if cached_session:
+        _restore_cookies(client.session.cookie_jar, cached_session)
+        try:
+            check_page = await client.get(sync_engine.ORWEJA_CHECK_URL)
+            if check_page.ok and sync_engine._is_logged_in_response(check_page):
+                print("✅ ORWEJA cached session still valid - skipping login")
+                return check_page.content
+        except Exception as e:
+            print(f"⚠️ Cached session check failed: {e}")
+
+        print("🔁 Cached ORWEJA session no longer valid - logging in again")
+        client.session.cookie_jar.clear()
+        await asyncio.to_thread(clear_state, sync_engine.db, sync_engine.ORWEJA_SESSION_STATE_KEY)
+
+    print("🔐 Authenticating with ORWEJA (async)...")
+
+    try:
+        login_url = sync_engine.ORWEJA_LOGIN_URL
+        login_page = await client.get(login_url)
+        login_page.raise_for_status()
+
+        login_form = BeautifulSoup(login_page.content, 'html.parser').find('form')
+        if not login_form:
+            print("❌ No login form found")
+            return None
+
+        username_field = None
+        password_field = None
+        for inp in login_form.find_all('input'):
+            type_attr = inp.get('type', '')
+            if type_attr == 'text' or type_attr == 'email':
+                username_field = inp.get('name', '')
+            elif type_attr == 'password':
+                password_field = inp.get('name', '')
+
+        if not username_field or not password_field:
+            print(f"❌ Could not find username/password fields. Found: username={username_field}, password={password_field}")
+            return None
+
+        login_data = {
+            username_field: sync_engine.ORWEJA_USERNAME,
+            password_field: sync_engine.ORWEJA_PASSWORD
+        }
+        response = await client.post(login_url, data=login_data)
+        print(f"📊 Login response status: {response.status_code}")
+
+        check_page = await client.get(sync_engine.ORWEJA_CHECK_URL)
+        print(f"📊 Test protected page status: {check_page.status_code}")
+
+        if not sync_engine._is_logged_in_response(check_page):
+            return None
+
+        print("✅ ORWEJA authentication successful - got substantial content")
+        await asyncio.to_thread(_save_cookies, client.session.cookie_jar)
+        return check_page.content
+
+    except Exception as e:
+        print(f"❌ ORWEJA authentication error: {e}")
+        return None
+
+async def fetch_calendar_async(client, calendar, prefetched_content, previous_state, row_cache=None):
+    """Async counterpart of main.scrape_calendar(), same result dict"""
+    print(f"📅 Scraping {calendar['name']} calendar...")
+
+    previous_state = previous_state or {}
+    result = {
+        'calendar': calendar,
+        'status': 'error',
+        'matches': [],
+        'state': {}
+    }
+
+    try:
+        if prefetched_content is not None:
+            print(f"♻️ Reusing login check page for {calendar['name']}")
+            content = prefetched_content
+        else:
+            headers = {}
+            if previous_state.get('etag'):
+                headers['If-None-Match'] = previous_state['etag']
+            if previous_state.get('last_modified'):
+                headers['If-Modified-Since'] = previous_state['last_modified']
+
+            page = await client.get(calendar['url'], headers=headers)
+            if page.status_code == 304:
+                print(f"⏭️ {calendar['name']} not modified (HTTP 304) - skipping")
+                result['status'] = 'unchanged'
+                return result
+
+            page.raise_for_status()
+            content = page.content
+            result['state']['etag'] = page.headers.get('ETag')
+            result['state']['last_modified'] = page.headers.get('Last-Modified')
+
+        # Hashing and parsing are CPU work: keep them off the event loop
+        parsed = await asyncio.to_thread(
+            sync_engine.parse_fetched_calendar, content, calendar, previous_state.get('content_hash'), row_cache
+        )
+        return sync_engine._apply_parsed_calendar(result, parsed)
+
+    except Exception as e:
+        print(f"❌ Error scraping {calendar['name']}: {e}")
+        result['error'] = str(e)
+        return result
+
+async def enrich_matches_async(client, matches, rate_limiter, stats, semaphore):
+    """Async counterpart of detail_enricher.enrich_matches(), updates stats in place"""
+    urls = []
+    for match in matches:
+        url = match.get('registration_url')
+        if url and url not in urls:
+            urls.append(url)
+    stats['urls'] += len(urls)
+
+    async def fetch_details(url):
+        cached = await asyncio.to_thread(_load_cached_details, sync_engine.db, url)
+        if cached is not None:
+            stats['cache_hits'] += 1
+            return url, cached
+
+        async with semaphore:
+            try:
+                await rate_limiter.wait(url)
+                page = await client.get(url)
+                page.raise_for_status()
+            except Exception as e:
+                print(f"⚠️ Error fetching registration details {url}: {e}")
+                stats['errors'] += 1
+                return url, None
+
+        details = await asyncio.to_thread(parse_detail_page, page.content)
+        await asyncio.to_thread(_store_cached_details, sync_engine.db, url, details, hashlib.sha256(page.content).hexdigest())
+        stats['fetched'] += 1
+        return url, details
+
+    details_by_url = dict(await asyncio.gather(*(fetch_details(url) for url in urls)))
+    for match in matches:
+        details = details_by_url.get(match.get('registration_url'))
+        if details:
+            match['registration_details'] = details
+
+async def sync_calendar_matches_async(adb, calendar_type, matches, write_semaphore, run_generation):
+    """
+    Sync the Firestore matches of one calendar (match_sync.py), returns the sync stats
+
+    run_generation is shared by the calendars of a run: {'generation': the
+    generation to write, 'held': whether it is recorded as pending,
+    'changes': the change feed records of the writes that landed so far}.
+    """
+
+    async def bounded(coro):
+        async with write_semaphore:
+            return await coro
+
+    existing = [doc async for doc in adb.collection(MATCHES_COLLECTION).where('calendar_type', '==', calendar_type).stream()]
+    generation = run_generation['generation']
+    operations = list(diff_matches(existing, (sync_engine.prepare_match_document(match) for match in matches), generation))
+
+    if not run_generation['held'] and any(operation != 'unchanged' for operation, _, _, _ in operations):
+        run_generation['held'] = True
+        await asyncio.to_thread(hold_generation, sync_engine.db, generation)
+
+    writes = []
+    records = []
+    for operation, doc_id, data, previous in operations:
+        if operation != 'unchanged':
+            records.append(change_record(operation, doc_id, data, previous))
+        if operation == 'inserted':
+            writes.append(bounded(adb.collection(MATCHES_COLLECTION).document(doc_id).set(data)))
+        elif operation == 'updated':
+            writes.append(bounded(adb.collection(MATCHES_COLLECTION).document(doc_id).update(staged_update(data, generation, previous))))
+        elif operation == 'deleted':
+            writes.append(bounded(adb.collection(MATCHES_COLLECTION).document(doc_id).update({'retired_generation': generation})))
+    results = await asyncio.gather(*writes, return_exceptions=True)
+
+    # The writes that landed show up as unchanged in the next run, record their changes now
+    errors = [result for result in results if isinstance(result, Exception)]
+    run_generation['changes'].extend(
+        record for record, result in zip(records, results) if record and not isinstance(result, Exception)
+    )
+    if errors:
+        raise errors[0]
+
+    stats = new_sync_stats()
+    for operation, _, _, _ in operations:
+        stats[operation] += 1
+    print(f"💾 Synced {calendar_type} matches to Firestore: {stats['inserted']} inserted, {stats['updated']} updated, "
+          f"{stats['deleted']} deleted, {stats['unchanged']} unchanged")
+    return stats
+
+async def run_tier2_pipeline_async(max_concurrency=None, conditional=True, calendars=None, enrich=False, write=True):
+    """
+    Async counterpart of main.run_tier2_scrape() that also does the Firestore writes
+
+    With write=True every changed calendar syncs its own matches as
+    soon as it is parsed, and its validators are stored afterwards.
+    Duplicates across calendars are dropped in calendar order, like the
+    sync engine does: a match listed in two calendars always stays with
+    the same one (calendar_type is part of its document ID). Matches
+    stored under a calendar that is unchanged or failed stay there, so
+    calendars only sync once every calendar has been fetched.
+    """
+    print("🔐 Starting Tier 2 scraping (protected calendars, async engine)...")
+
+    scrape_result = {
+        'authenticated': False,
+        'matches': [],
+        'calendar_results': [],
+        'enrichment': None,
+        'row_cache': None,
+        'transport': {},
+        'sync': None
+    }
+
+    if calendars is None:
+        calendars = sync_engine.TIER2_CALENDARS
+    if max_concurrency is None:
+        max_concurrency = sync_engine.MAX_CALENDAR_CONCURRENCY
+    max_concurrency = max(1, min(max_concurrency, len(calendars)))
+
+    timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit_per_host=max(max_concurrency, ENRICH_MAX_WORKERS))
+    headers = {'User-Agent': USER_AGENT}
+
+    # unsafe=True keeps cookies of IP hosts too (orweja_standin.py on 127.0.0.1)
+    cookie_jar = aiohttp.CookieJar(unsafe=True)
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector, headers=headers, cookie_jar=cookie_jar) as session:
+        client = AsyncOrwejaClient(session)
+
+        check_page = await open_orweja_session_async(client)
+        if check_page is None:
+            print("❌ Authentication failed - cannot access protected calendars")
+            return scrape_result
+        scrape_result['authenticated'] = True
+
+        previous_states = {}
+        if conditional:
+            states = await asyncio.gather(*(
+                asyncio.to_thread(sync_engine.load_calendar_state, calendar)
+                for calendar in calendars
+            ))
+            previous_states = {calendar['url']: state for calendar, state in zip(calendars, states)}
+        row_caches = await asyncio.to_thread(sync_engine.load_row_caches, calendars)
+
+        adb = firestore.AsyncClient() if write and sync_engine.db else None
+        run_generation = None
+        if adb:
+            try:
+                await asyncio.to_thread(collect_retired_matches, sync_engine.db)
+                published, pending = await asyncio.to_thread(load_generation_pointer, sync_engine.db)
+                run_generation = {'generation': published + 1, 'held': pending is not None, 'failed': False, 'changes': []}
+                scrape_result['sync'] = new_sync_stats()
+            except Exception as e:
+                print(f"❌ Error loading the match generation ({e}) - not writing this run")
+                adb = None
+        fetch_semaphore = asyncio.Semaphore(max_concurrency)
+        write_semaphore = asyncio.Semaphore(FIRESTORE_WRITE_CONCURRENCY)
+        detail_semaphore = asyncio.Semaphore(ENRICH_MAX_WORKERS)
+        rate_limiter = AsyncHostRateLimiter()
+        enrichment = {'urls': 0, 'cache_hits': 0, 'fetched': 0, 'errors': 0}
+        # Match keys of every calendar, set once it is parsed (None when unchanged or failed)
+        calendar_keys = [asyncio.get_running_loop().create_future() for _ in calendars]
+        skipped_keys_task = None
+
+        async def load_skipped_keys():
+            outcomes = await asyncio.gather(*calendar_keys)
+            skipped = [calendar['calendar_type'] for calendar, keys in zip(calendars, outcomes) if keys is None]
+            return await asyncio.to_thread(sync_engine.load_stored_match_keys, skipped)
+
+        def skipped_keys():
+            """Keys of the stored matches of the calendars not synced this run, loaded once"""
+            nonlocal skipped_keys_task
+            if skipped_keys_task is None:
+                skipped_keys_task = asyncio.ensure_future(load_skipped_keys())
+            return skipped_keys_task
+
+        print(f"⚡ Fetching {len(calendars)} calendars (concurrency: {max_concurrency})")
+        started = time.time()
+
+        async def process(index, calendar):
+            keys = None
+            try:
+                async with fetch_semaphore:
+                    result = await fetch_calendar_async(
+                        client,
+                        calendar,
+                        check_page if calendar['url'] == sync_engine.ORWEJA_CHECK_URL else None,
+                        previous_states.get(calendar['url']),
+                        row_caches.get(calendar['url'])
+                    )
+                if result['status'] == 'changed':
+                    keys = {sync_engine.match_key(match) for match in result['matches']}
+            finally:
+                # Later calendars wait for these keys, also when this one failed
+                calendar_keys[index].set_result(keys)
+            if result['status'] != 'changed':
+                return result
+
+            # Cross-calendar dedup against the calendars before this one (in calendar order) and
+            # the stored matches of the calendars that keep their documents this run
+            seen_keys = set(await skipped_keys())
+            for earlier_keys in calendar_keys[:index]:
+                seen_keys |= (await earlier_keys) or set()
+            result['matches_parsed'] = len(result['matches'])
+            unique = list(sync_engine.iter_unique_matches(result['matches'], seen_keys))
+            result['matches'] = unique
+
+            if enrich and unique:
+                await enrich_matches_async(client, unique, rate_limiter, enrichment, detail_semaphore)
+
+            # A page that parsed to nothing is suspicious, keep its old documents
+            if adb and result['matches_parsed']:
+                try:
+                    add_sync_stats(scrape_result['sync'], await sync_calendar_matches_async(
+                        adb, calendar['calendar_type'], unique, write_semaphore, run_generation
+                    ))
+                    await asyncio.to_thread(save_state, sync_engine.db, sync_engine._calendar_state_key(calendar), result['state'])
+                except Exception as e:
+                    print(f"❌ Error writing {calendar['name']} matches: {e}")
+                    run_generation['failed'] = True
+                    result['status'] = 'error'
+                    result['error'] = str(e)
+            return result
+
+        calendar_results = await asyncio.gather(*(process(index, calendar) for index, calendar in enumerate(calendars)))
+
+        # Flip the pointer only when every calendar has landed, else the next run publishes it
+        if run_generation and run_generation['held']:
+            generation = run_generation['generation']
+            if run_generation['failed']:
+                print(f"⚠️ Sync incomplete - generation {generation} not published")
+            else:
+                try:
+                    await asyncio.to_thread(publish_generation, sync_engine.db, generation)
+                    scrape_result['sync']['generation'] = generation
+                except Exception as e:
+                    print(f"❌ Error publishing generation {generation}: {e}")
+                else:
+                    # Queries on top-level fields (openings, past matches) now see the published updates
+                    await asyncio.to_thread(fold_staged_matches, sync_engine.db, generation)
+
+        # Only the changes whose writes landed are recorded
+        if run_generation and run_generation['changes']:
+            scrape_result['sync']['changes'] = await asyncio.to_thread(
+                emit_changes, sync_engine.db, run_generation['changes'],
+                run_generation['generation'] if run_generation['held'] else None
+            )
+
+        for calendar_result in calendar_results:
+            scrape_result['matches'].extend(calendar_result['matches'])
+
+        print(f"⏱️ Async pipeline took {time.time() - started:.2f}s")
+        print(f"📊 After deduplication: {len(scrape_result['matches'])} unique matches")
+
+        scrape_result['calendar_results'] = list(calendar_results)
+        scrape_result['row_cache'] = await asyncio.to_thread(sync_engine.save_row_caches, calendar_results)
+        if enrich:
+            scrape_result['enrichment'] = enrichment
+        scrape_result['transport'] = client.stats()
+
+    return scrape_result
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the calendar parser backends on the saved ORWEJA pages
+
+Compares today's whole-page html.parser tree with lxml, with
+SoupStrainer-scoped parsing and with the streaming lxml row parser: parse
+time per calendar page (best of --repeat runs) and peak Python memory
+(tracemalloc) while parsing. Every mode must produce the same matches as
+html.parser.
+
+Usage:
+    python benchmark_calendar_parsing.py
+    python benchmark_calendar_parsing.py --rows 1000 --repeat 3
+"""
+
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+from calendar_html import iter_calendar_rows
+from orweja_standin import load_fixture, scale_calendar_rows
+import main
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CALENDAR = {'name': 'Benchmark', 'calendar_type': 'Jachthondenproef'}
+
+# (label, backend, scoped, stream)
+MODES = [
+    ('html.parser (whole page)', 'html.parser', False, False),
+    ('html.parser + strainer', 'html.parser', True, False),
+    ('lxml (whole page)', 'lxml', False, False),
+    ('lxml + strainer', 'lxml', True, False),
+    ('lxml streaming rows', 'lxml', True, True),
+]
+
+def parse(content, parser, scoped, stream):
+    rows = iter_calendar_rows(content, parser=parser, scoped=scoped, stream=stream)
+    return list(main.iter_calendar_matches(rows, CALENDAR))
+
+def measure(content, parser, scoped, stream, repeat):
+    """Best wall time over repeat runs and peak traced memory of one run"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matches = parse(content, parser, scoped, stream)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    parse(content, parser, scoped, stream)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak, matches
+
+def load_pages(rows):
+    """The saved calendar captures, optionally scaled to synthetic row counts"""
+    pages = []
+    paths = sorted(glob.glob(os.path.join(HERE, 'debug_*.html')))
+    paths.append(os.path.join(HERE, 'My ORWEJA proeven- en inschrijvingssysteem.html'))
+
+    for path in paths:
+        content = load_fixture(path)
+        pages.append((os.path.basename(path), content))
+        if rows and b'kalrow' in content:
+            pages.append((f"{os.path.basename(path)} x{rows} rows", scale_calendar_rows(content, rows)))
+    return pages
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description='Calendar parser benchmark')
+    parser.add_argument('--rows', type=int, default=0, help='also benchmark the calendars scaled to this many rows')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        import lxml  # noqa: F401
+        modes = MODES
+    except ImportError:
+        print("⚠️ lxml not installed - only benchmarking html.parser")
+        modes = [mode for mode in MODES if mode[1] == 'html.parser']
+
+    for name, content in load_pages(args.rows):
+        print(f"\n📄 {name} ({len(content) / 1024:.0f} KiB)")
+        print(f"   {'mode':<26} {'matches':>8} {'time ms':>10} {'peak KiB':>10} {'speedup':>8}")
+
+        baseline_time = None
+        baseline_matches = None
+        for label, backend, scoped, stream in modes:
+            elapsed, peak, matches = measure(content, backend, scoped, stream, args.repeat)
+            if baseline_time is None:
+                baseline_time, baseline_matches = elapsed, matches
+
+            same = '' if matches == baseline_matches else '  ❌ differs from html.parser'
+            print(f"   {label:<26} {len(matches):>8} {elapsed * 1000:>10.1f} {peak / 1024:>10.0f} "
+                  f"{baseline_time / elapsed:>7.1f}x{same}")
+
+if __name__ == "__main__":
+    main_benchmark()
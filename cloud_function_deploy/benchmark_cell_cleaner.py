@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass cell cleaner against the former re.sub() chains
+
+Cells come from the saved calendar page (replicated to --cells cells) plus
+synthetic email and start time artifacts. Both implementations must give
+the same text for every cell.
+
+Usage:
+    python benchmark_cell_cleaner.py
+    python benchmark_cell_cleaner.py --cells 200000 --repeat 3
+"""
+
+import argparse
+import html
+import os
+import re
+import time
+import unicodedata
+
+from calendar_html import iter_calendar_rows
+from cell_cleaner import clean_cell, clean_location, normalize_organizer
+from orweja_standin import load_fixture
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PAGE = os.path.join(HERE, 'My ORWEJA proeven- en inschrijvingssysteem.html')
+
+SYNTHETIC_CELLS = [
+    'KNJV Provincie Gelderland [email\xa0protected]',
+    'Jachthuis De Wildbaan   Aanvang: 8.30',
+    'Ede\n  Aanvang: 09:00  [email protected] info',
+    'O.V.V.D. Regio "Noord" &amp; Oost',
+]
+
+# The cleanup as parse_calendar_row() and normalize_org() did it before
+def legacy_clean_cell(text):
+    text = re.sub(r'\[email[^\]]*\]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def legacy_clean_location(text):
+    text = re.sub(r'\[email[^\]]*\]', '', text)
+    text = re.sub(r'Aanvang:\s*\d{1,2}[:.]\d{2}', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def legacy_normalize_organizer(org):
+    org = html.unescape(org)
+    org = re.sub(r'<[^>]+>', '', org)
+    org = unicodedata.normalize('NFKC', org)
+    org = org.lower()
+    org = re.sub(r'[^\w\s]', '', org)
+    org = re.sub(r'\s+', ' ', org)
+    return org.strip()
+
+def load_cells(count):
+    """Cell texts of the saved calendar page plus the synthetic cases, repeated up to count"""
+    cells = list(SYNTHETIC_CELLS)
+    if os.path.exists(PAGE):
+        for row in iter_calendar_rows(load_fixture(PAGE)):
+            cells.extend(text for text, _ in row)
+    return [cells[index % len(cells)] for index in range(count)]
+
+def timed(function, repeat):
+    """Best wall time over repeat runs and the result of the last one"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description='Cell cleaner benchmark')
+    parser.add_argument('--cells', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    cells = load_cells(args.cells)
+    print(f"🧪 {len(cells)} cells ({len(set(cells))} distinct), best of {args.repeat}")
+    print(f"   {'cleanup':<22} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}")
+
+    cases = [
+        ('cell', lambda: [legacy_clean_cell(cell) for cell in cells],
+                 lambda: [clean_cell(cell) for cell in cells]),
+        ('location', lambda: [legacy_clean_location(cell) for cell in cells],
+                     lambda: [clean_location(cell) for cell in cells]),
+        ('organizer key', lambda: [legacy_normalize_organizer(cell) for cell in cells],
+                          lambda: [normalize_organizer(cell) for cell in cells]),
+    ]
+
+    for label, legacy, new in cases:
+        legacy_time, expected = timed(legacy, args.repeat)
+        new_time, result = timed(new, args.repeat)
+        same = '' if result == expected else '  ❌ output differs'
+        print(f"   {label:<22} {legacy_time * 1000:>10.1f} {new_time * 1000:>10.1f} "
+              f"{legacy_time / new_time:>7.1f}x{same}")
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark fuzzy_index.FuzzyIndex against a pairwise SequenceMatcher scan
+
+The history stands for several seasons of organizers: names recombined
+from the words of the organizers in the calendar capture, so most of them
+are distinct but share the usual words ('vereniging', 'jachthonden', ...).
+Queries are history names with a typo, a dropped word or other casing.
+For each query both lookups return their best candidates; recall is how
+often the SequenceMatcher best is among the index's top k.
+
+Usage:
+    python benchmark_fuzzy_index.py
+    python benchmark_fuzzy_index.py --sizes 1000,10000,50000 --queries 10 --k 5
+"""
+
+import argparse
+import os
+import random
+import time
+from difflib import SequenceMatcher
+
+from calendar_html import iter_calendar_rows
+from cell_cleaner import normalize_organizer
+from fuzzy_index import FuzzyIndex
+from orweja_standin import load_fixture
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CALENDAR_PAGE = os.path.join(HERE, 'My ORWEJA proeven- en inschrijvingssysteem.html')
+
+def organizer_words():
+    words = []
+    for cells in list(iter_calendar_rows(load_fixture(CALENDAR_PAGE)))[1:]:
+        if len(cells) >= 4:
+            words.extend(normalize_organizer(cells[2][0]).split())
+    return sorted(set(words))
+
+def build_history(size, words, rng):
+    """`size` distinct organizer names of 2-5 calendar words"""
+    history = set()
+    while len(history) < size:
+        history.add(' '.join(rng.choice(words) for _ in range(rng.randint(2, 5))))
+    return sorted(history)
+
+def vary(name, rng):
+    """A name as another source might spell it"""
+    words = name.split()
+    kind = rng.randrange(3)
+    if kind == 0:
+        position = rng.randrange(len(name))
+        return name[:position] + name[position + 1:]
+    if kind == 1 and len(words) > 2:
+        words.pop(rng.randrange(len(words)))
+        return ' '.join(words)
+    return name.upper()
+
+def pairwise_best(query, history):
+    """The best history name for query by SequenceMatcher ratio, scanning everything"""
+    query = normalize_organizer(query)
+    return max(history, key=lambda name: SequenceMatcher(None, query, name).ratio())
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description='Fuzzy organizer index benchmark')
+    parser.add_argument('--sizes', default='1000,10000', help='comma-separated history sizes')
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--min-score', type=float, default=0.5)
+    args = parser.parse_args()
+
+    words = organizer_words()
+    print(f"🔤 {len(words)} organizer words from the calendar capture")
+    print(f"   {'history':>8} {'build ms':>9} {'pairwise ms/q':>14} {'index ms/q':>11} {'speedup':>8} {'recall@k':>9}")
+
+    for size in [int(size) for size in args.sizes.split(',') if size.strip()]:
+        rng = random.Random(size)
+        history = build_history(size, words, rng)
+        queries = [vary(rng.choice(history), rng) for _ in range(args.queries)]
+
+        started = time.perf_counter()
+        index = FuzzyIndex()
+        for name in history:
+            index.add(name)
+        build_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = [pairwise_best(query, history) for query in queries]
+        pairwise_time = (time.perf_counter() - started) / len(queries)
+
+        started = time.perf_counter()
+        found = [[item for _, item in index.query(query, k=args.k, min_score=args.min_score)] for query in queries]
+        index_time = (time.perf_counter() - started) / len(queries)
+
+        recall = sum(1 for best, top in zip(expected, found) if best in top) / len(queries)
+        print(f"   {size:>8} {build_time * 1000:>9.1f} {pairwise_time * 1000:>14.2f} {index_time * 1000:>11.3f} "
+              f"{pairwise_time / index_time:>7.0f}x {recall:>9.0%}")
+
+if __name__ == "__main__":
+    main_benchmark()
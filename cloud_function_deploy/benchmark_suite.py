@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Scraper benchmark suite with a regression check against earlier runs
+
+Times the tier-2 pipeline end to end and its hot helpers, on the saved
+ORWEJA pages and on calendars scaled to synthetic row counts:
+  - scrape_tier2_protected_calendars() against orweja_standin.py (no network)
+  - parse_calendar_page() on every saved page
+  - parse_date(), normalize_org(), similarity(), classify_match_type(),
+    deduplicate_matches() and export_matches_to_csv() on the scaled rows
+
+Every run is appended to benchmark_history.jsonl (commit, host, best time
+per benchmark). A benchmark more than --threshold times slower than its
+best of the last runs on the same host is reported as a regression;
+with --check the exit status is 1 then, so it can gate a deploy.
+
+Usage:
+    python benchmark_suite.py
+    python benchmark_suite.py --sizes 1000,10000 --repeat 3 --check
+    python benchmark_suite.py --only parse_date,dedup --no-save
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from calendar_html import iter_calendar_rows
+from orweja_standin import load_fixture, scale_calendar_rows, start_standin
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CALENDAR_PAGE = os.path.join(HERE, 'My ORWEJA proeven- en inschrijvingssysteem.html')
+HISTORY_FILE = os.path.join(HERE, 'benchmark_history.jsonl')
+CALENDAR = {'name': 'Benchmark', 'calendar_type': 'Jachthondenproef'}
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+# Regressions are measured against the best result of this many earlier runs
+HISTORY_WINDOW = 5
+
+def timed(function, repeat, setup=None):
+    """Best wall time over repeat runs; setup runs untimed before each one"""
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def find_regressions(results, history, threshold):
+    """(name, seconds, baseline) for every benchmark slower than threshold x its recent best"""
+    host = platform.node()
+    recent = [run for run in history if run.get('host') == host][-HISTORY_WINDOW:]
+
+    regressions = []
+    for name, seconds in results.items():
+        previous = [run['results'][name] for run in recent if name in run.get('results', {})]
+        if previous and seconds > min(previous) * threshold:
+            regressions.append((name, seconds, min(previous)))
+    return regressions
+
+def synthetic_rows(rows):
+    """The data cells of the calendar capture scaled to `rows` rows"""
+    page = scale_calendar_rows(load_fixture(CALENDAR_PAGE), rows)
+    return list(iter_calendar_rows(page))[1:]
+
+def run_benchmarks(sizes, repeat, selected):
+    """{benchmark name: best seconds}"""
+    # The scraper reads its base URL at import, so the stand-in has to be up first
+    server, base_url = start_standin()
+    os.environ['ORWEJA_BASE_URL'] = base_url
+
+    import main
+    from match_types import classify_match_type
+    from working_scraper import normalize_org, similarity
+    from cell_cleaner import normalize_organizer
+    from date_parsing import parse_calendar_date
+
+    def wanted(group):
+        return not selected or group in selected
+
+    results = {}
+
+    def record(name, seconds, count=None):
+        results[name] = seconds
+        rate = f" ({count / seconds:,.0f}/s)" if count and seconds else ''
+        print(f"   {name:<40} {seconds * 1000:>10.1f} ms{rate}")
+
+    try:
+        if wanted('pages'):
+            print("\n📄 Saved pages")
+            paths = sorted(glob.glob(os.path.join(HERE, 'debug_*.html'))) + [CALENDAR_PAGE]
+            for path in paths:
+                content = load_fixture(path)
+                seconds = timed(lambda: main.parse_calendar_page(content, CALENDAR), repeat)
+                record(f"parse_page[{os.path.basename(path)}]", seconds)
+
+        for rows in sizes:
+            print(f"\n📈 {rows:,} rows per calendar")
+
+            if wanted('scrape'):
+                # HTTP is served locally by the stand-in, the scrape parses 3 calendars of `rows` rows
+                server.config.rows = rows
+                server.config._pages.clear()
+                seconds = timed(main.scrape_tier2_protected_calendars, repeat)
+                record(f"scrape_tier2[{rows}]", seconds, 3 * rows)
+
+            cells = synthetic_rows(rows)
+            date_texts = [row[0][0] for row in cells]
+            raw_types = [row[1][0] for row in cells]
+            organizers = [row[2][0] for row in cells]
+            matches = [match for match in (main.parse_calendar_row(row, CALENDAR) for row in cells) if match]
+
+            if wanted('parse_date'):
+                seconds = timed(lambda: [main.parse_date(text) for text in date_texts], repeat,
+                                setup=parse_calendar_date.cache_clear)
+                record(f"parse_date[{rows}]", seconds, rows)
+
+            if wanted('normalize_org'):
+                seconds = timed(lambda: [normalize_org(org) for org in organizers], repeat,
+                                setup=normalize_organizer.cache_clear)
+                record(f"normalize_org[{rows}]", seconds, rows)
+
+            if wanted('similarity'):
+                pairs = list(zip(organizers, organizers[1:] + organizers[:1]))
+                seconds = timed(lambda: [similarity(a, b) for a, b in pairs], repeat,
+                                setup=normalize_organizer.cache_clear)
+                record(f"similarity[{rows}]", seconds, rows)
+
+            if wanted('classify'):
+                def classify_all():
+                    for calendar_type in ('Veldwedstrijd', 'Jachthondenproef'):
+                        for match_type in raw_types:
+                            classify_match_type(match_type, calendar_type)
+                seconds = timed(classify_all, repeat, setup=classify_match_type.cache_clear)
+                record(f"classify_match_type[{rows}]", seconds, 2 * rows)
+
+            if wanted('dedup'):
+                # Every match twice, as when the calendars overlap
+                doubled = matches + matches
+                seconds = timed(lambda: main.deduplicate_matches(doubled), repeat)
+                record(f"deduplicate_matches[{rows}]", seconds, len(doubled))
+
+            if wanted('export_csv'):
+                seconds = timed(lambda: main.export_matches_to_csv([], matches), repeat)
+                record(f"export_matches_to_csv[{rows}]", seconds, len(matches))
+    finally:
+        server.shutdown()
+
+    return results
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description='Scraper benchmark suite')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='comma-separated synthetic rows per calendar')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default='',
+                        help='comma-separated groups: pages,scrape,parse_date,normalize_org,similarity,classify,dedup,export_csv')
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown factor reported as a regression')
+    parser.add_argument('--no-save', action='store_true', help="don't append this run to the history")
+    parser.add_argument('--check', action='store_true', help='exit with status 1 on regressions')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    selected = {group.strip() for group in args.only.split(',') if group.strip()}
+
+    print(f"🧪 Benchmark suite (sizes: {sizes}, best of {args.repeat})")
+    results = run_benchmarks(sizes, args.repeat, selected)
+
+    history = load_history(args.history)
+    regressions = find_regressions(results, history, args.threshold)
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against the best of the last {HISTORY_WINDOW} runs:")
+        for name, seconds, baseline in regressions:
+            print(f"   {name}: {seconds * 1000:.1f} ms vs {baseline * 1000:.1f} ms ({seconds / baseline:.2f}x)")
+    elif history:
+        print(f"\n✅ No regressions beyond {args.threshold:.2f}x")
+
+    if not args.no_save:
+        run = {
+            'timestamp': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'host': platform.node(),
+            'python': platform.python_version(),
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'results': results
+        }
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(run) + '\n')
+        print(f"💾 Results appended to {args.history}")
+
+    if args.check and regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main_benchmark()
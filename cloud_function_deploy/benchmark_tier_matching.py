@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark the date-blocked tier-1/tier-2 matcher against the nested loops
+
+Tier 2 is the calendar capture scaled to --sizes rows (a season is about
+1000 rows, larger sizes stand for several seasons), tier 1 the same rows
+shuffled with organizer variations ('Stichting ...', punctuation, some
+organizers that match nothing). Both matchers of working_scraper.py and
+main.py must return the same matches as their former nested-loop version.
+
+Usage:
+    python benchmark_tier_matching.py
+    python benchmark_tier_matching.py --sizes 1000,5000,10000 --repeat 1
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+
+from calendar_html import iter_calendar_rows
+from date_parsing import parse_calendar_date
+from orweja_standin import load_fixture, scale_calendar_rows
+import main
+import working_scraper
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CALENDAR_PAGE = os.path.join(HERE, 'My ORWEJA proeven- en inschrijvingssysteem.html')
+
+# The matchers as they were before the date index: every tier-1 row scans all tier-2 rows
+def legacy_working_scraper_match(tier1_matches, tier2_matches):
+    normalize_org = working_scraper.normalize_org
+    similarity = working_scraper.similarity
+    matched_matches = []
+    unmatched_tier1 = []
+    for tier1_match in tier1_matches:
+        best_match = None
+        best_similarity = 0
+        norm_t1_org = normalize_org(tier1_match['organizer'])
+        for tier2_match in tier2_matches:
+            if tier1_match['date'] == tier2_match['date']:
+                norm_t2_org = normalize_org(tier2_match['organizer'])
+                org_similarity = similarity(norm_t1_org, norm_t2_org)
+                if org_similarity > 0.5 and org_similarity > best_similarity:
+                    best_match = tier2_match
+                    best_similarity = org_similarity
+        if best_match:
+            matched_matches.append({
+                'date': tier1_match['date'],
+                'organizer': tier1_match['organizer'],
+                'location': tier1_match['location'],
+                'registration_text': tier1_match['registration_text'],
+                'type': best_match['type'],
+                'source': 'matched',
+                'tier2_calendar_type': best_match.get('calendar_type', '')
+            })
+        else:
+            unmatched_tier1.append(tier1_match)
+    return matched_matches + unmatched_tier1
+
+def legacy_main_match(tier1_matches, tier2_matches):
+    matched_matches = []
+    unmatched_tier1 = []
+    for tier1_match in tier1_matches:
+        best_match = None
+        best_similarity = 0
+        for tier2_match in tier2_matches:
+            if tier1_match['date'] == tier2_match['date']:
+                org_similarity = main.similarity(tier1_match['organizer'], tier2_match['organizer'])
+                if org_similarity > 0.5 and org_similarity > best_similarity:
+                    best_match = tier2_match
+                    best_similarity = org_similarity
+        if best_match:
+            matched_matches.append({
+                'date': tier1_match['date'],
+                'organizer': tier1_match['organizer'],
+                'location': tier1_match['location'],
+                'registration_text': tier1_match['registration_text'],
+                'type': best_match['type'],
+                'source': 'matched',
+                'tier2_calendar_type': best_match.get('calendar_type', '')
+            })
+        else:
+            unmatched_tier1.append(tier1_match)
+    return matched_matches + unmatched_tier1
+
+def build_tiers(rows):
+    """(tier1, tier2) entries from the calendar capture scaled to `rows` rows"""
+    page = scale_calendar_rows(load_fixture(CALENDAR_PAGE), rows)
+    tier2 = []
+    for cells in list(iter_calendar_rows(page))[1:]:
+        if len(cells) < 6:
+            continue
+        tier2.append({
+            'date': parse_calendar_date(cells[0][0]),
+            'type': cells[1][0],
+            'organizer': cells[2][0],
+            'location': cells[3][0],
+            'registration_text': cells[5][0],
+            'calendar_type': 'Jachthondenproef'
+        })
+
+    shuffle = random.Random(0)
+    tier1 = []
+    for index, entry in enumerate(tier2):
+        organizer = entry['organizer']
+        if index % 3 == 0:
+            organizer = f"Stichting {organizer}"
+        elif index % 5 == 0:
+            organizer = organizer.upper().replace(' ', '.')
+        elif index % 7 == 0:
+            organizer = f"Onbekende vereniging {index}"
+        tier1.append(dict(entry, organizer=organizer, type='Tier 1'))
+    shuffle.shuffle(tier1)
+    return tier1, tier2
+
+def timed(function, repeat):
+    """Best wall time over repeat runs (output silenced) and the result of the last one"""
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description='Tier-1/tier-2 matching benchmark')
+    parser.add_argument('--sizes', default='1000,5000', help='comma-separated rows per tier')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    matchers = [
+        ('working_scraper', legacy_working_scraper_match, working_scraper.match_tier1_tier2),
+        ('main (archived)', legacy_main_match, main.match_tier1_tier2_ARCHIVED),
+    ]
+
+    for rows in [int(size) for size in args.sizes.split(',') if size.strip()]:
+        tier1, tier2 = build_tiers(rows)
+        print(f"\n📈 {len(tier1)} tier-1 x {len(tier2)} tier-2 entries")
+        print(f"   {'matcher':<18} {'matched':>8} {'nested ms':>11} {'indexed ms':>11} {'speedup':>8}")
+
+        for label, legacy, indexed in matchers:
+            legacy_time, expected = timed(lambda: legacy(tier1, tier2), args.repeat)
+            indexed_time, result = timed(lambda: indexed(tier1, tier2), args.repeat)
+            matched = sum(1 for match in result if match.get('source') == 'matched')
+            same = '' if result == expected else '  ❌ results differ'
+            print(f"   {label:<18} {matched:>8} {legacy_time * 1000:>11.1f} {indexed_time * 1000:>11.1f} "
+                  f"{legacy_time / indexed_time:>7.1f}x{same}")
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Calendar page parsing backend
+Builds BeautifulSoup trees of only the parts of an ORWEJA page we read
+
+The calendar pages are mostly navigation, scripts and sidebars; a
+SoupStrainer limits the tree to the calendar table (or the table rows), and
+lxml builds it in C instead of the pure-Python html.parser. With lxml the
+calendar rows can also be streamed (iter_calendar_rows): an event-based
+pull parser hands out one row at a time and drops it again, so memory
+stays flat however long the calendar gets.
+
+ORWEJA_HTML_PARSER selects the backend ('lxml' or 'html.parser', default:
+lxml when installed). ORWEJA_SCOPED_PARSING=false parses whole pages again,
+ORWEJA_STREAM_ROWS=false builds a (scoped) tree of the rows instead.
+"""
+
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+def _default_parser():
+    """lxml when it is installed, the built-in parser otherwise"""
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+HTML_PARSER = os.environ.get('ORWEJA_HTML_PARSER') or _default_parser()
+SCOPED_PARSING = os.environ.get('ORWEJA_SCOPED_PARSING', 'true').lower() == 'true'
+STREAM_ROWS = os.environ.get('ORWEJA_STREAM_ROWS', 'true').lower() == 'true'
+
+# Bytes fed to the pull parser at a time when streaming a response
+STREAM_CHUNK_SIZE = 64 * 1024
+
+ROWS_STRAINER = SoupStrainer('tr')
+
+def calendar_soup(content, strainer=None, parser=None, scoped=None):
+    """BeautifulSoup of a page, limited to strainer when scoped parsing is on"""
+    if scoped is None:
+        scoped = SCOPED_PARSING
+    return BeautifulSoup(content, parser or HTML_PARSER, parse_only=strainer if scoped else None)
+
+def _class_pattern(css_class):
+    """Match one class in a class attribute, the strainer sees the raw 'table table-hover' string"""
+    return re.compile(rf'(?:^|\s){re.escape(css_class)}(?:\s|$)')
+
+def calendar_table(content, table_class='table', parser=None, scoped=None):
+    """The first <table> with table_class on the page, None when there is none"""
+    soup = calendar_soup(content, SoupStrainer('table', class_=_class_pattern(table_class)), parser, scoped)
+    return soup.find('table', class_=table_class)
+
+def table_rows(content, parser=None, scoped=None):
+    """All <tr> elements of a page (public widget)"""
+    return calendar_soup(content, ROWS_STRAINER, parser, scoped).find_all('tr')
+
+def _tag_cells(row):
+    """(text, first link href) per <td> of a BeautifulSoup row"""
+    cells = []
+    for cell in row.find_all('td'):
+        link = cell.find('a')
+        cells.append((cell.get_text(strip=True), link.get('href') if link else None))
+    return cells
+
+def _element_cells(row):
+    """(text, first link href) per <td> of an lxml row, same text as get_text(strip=True)"""
+    cells = []
+    for cell in row.iter('td'):
+        text = ''.join(part.strip() for part in cell.itertext())
+        link = next(cell.iter('a'), None)
+        cells.append((text, link.get('href') if link is not None else None))
+    return cells
+
+def _as_chunks(content):
+    """Accept a whole page (bytes/str) or an iterable of chunks (response.iter_content())"""
+    if isinstance(content, (bytes, str)):
+        return [content]
+    return content
+
+def _stream_table_rows(content, table_class):
+    """Pull-parse the page and yield the cells of every row of the first table.<table_class>"""
+    from lxml import etree
+
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    depth = 0
+    done = False
+
+    def drain():
+        nonlocal depth, done
+        for event, element in parser.read_events():
+            if done:
+                continue
+            if element.tag == 'table':
+                if event == 'start':
+                    if depth or table_class in (element.get('class') or '').split():
+                        depth += 1
+                elif depth:
+                    depth -= 1
+                    done = depth == 0
+            elif event == 'end' and depth and element.tag == 'tr':
+                yield _element_cells(element)
+                # Drop the rows we handed out, the tree never holds more than one
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                while element.getprevious() is not None:
+                    del parent[0]
+            elif event == 'end' and not depth:
+                # Navigation, scripts and sidebars around the table
+                element.clear(keep_tail=True)
+
+    for chunk in _as_chunks(content):
+        parser.feed(chunk)
+        yield from drain()
+        if done:
+            return
+
+    parser.close()
+    yield from drain()
+
+def iter_calendar_rows(content, table_class='table', parser=None, scoped=None, stream=None):
+    """
+    Yield the rows of the first table.<table_class> as lists of (text, href) cells
+
+    content is the page body or an iterable of byte chunks. Text equals
+    get_text(strip=True) of the cell, href is the first link in it (or
+    None). The header row is included. Streams with lxml, builds a tree
+    with BeautifulSoup otherwise.
+    """
+    if stream is None:
+        stream = STREAM_ROWS and (parser or HTML_PARSER) == 'lxml'
+
+    if stream:
+        yield from _stream_table_rows(content, table_class)
+        return
+
+    chunks = list(_as_chunks(content))
+    page = chunks[0][:0].join(chunks) if chunks else b''
+    table = calendar_table(page, table_class, parser, scoped)
+    if table:
+        for row in table.find_all('tr'):
+            yield _tag_cells(row)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Cell text cleaning shared by all scrapers and analysis scripts
+
+Each cleanup is one precompiled pattern with all of its removals combined
+in a single alternation, followed by a whitespace collapse through
+str.split()/join. A cell is scanned once, instead of once per re.sub() call.
+Patterns are skipped entirely when a cheap substring test shows they can't
+match.
+"""
+
+import html
+import re
+import unicodedata
+from functools import lru_cache
+
+# '[email protected]' (Cloudflare email obfuscation) and its variants
+_EMAIL = r'\[email[^\]]*\]'
+_START_TIME = r'Aanvang:\s*\d{1,2}[:.]\d{2}'
+
+CELL_PATTERN = re.compile(_EMAIL)
+LOCATION_PATTERN = re.compile(f'{_EMAIL}|{_START_TIME}')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]+')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Escaped JSON dumps of scraper responses (analysis scripts)
+ESCAPED_PATTERN = re.compile(r'\\+|u00[a-fA-F0-9]{2}|\[email.*?protected\]')
+ESCAPED_START_TIME_PATTERN = re.compile(r'\\+|u00[a-fA-F0-9]{2}|\[email.*?protected\]|Aanvang:.*', re.DOTALL)
+EXPORT_FIELD_PATTERN = re.compile(r'\\[nr]|\\"|\\\\|i\.s\.m:\s*')
+EXPORT_FIELD_REPLACEMENTS = {'\\n': ' ', '\\r': ' ', '\\"': '"', '\\\\': '\\'}
+
+def collapse_whitespace(text):
+    """Collapse whitespace runs into single spaces and strip"""
+    return ' '.join(text.split())
+
+def clean_cell(text):
+    """Remove email obfuscation artifacts and collapse whitespace"""
+    if '[' in text:
+        text = CELL_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+def clean_location(text):
+    """clean_cell() that also drops the 'Aanvang: 8.00' start time"""
+    if '[' in text or 'Aanvang:' in text:
+        text = LOCATION_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+@lru_cache(maxsize=4096)
+def normalize_organizer(org):
+    """
+    Comparison key for organizer names
+
+    HTML entities and tags removed, unicode NFKC-normalized, lowercase,
+    punctuation dropped and whitespace collapsed. Cached, as the tier
+    matching compares the same organizer names over and over.
+    """
+    if '&' in org:
+        org = html.unescape(org)
+    if '<' in org:
+        org = TAG_PATTERN.sub('', org)
+    org = unicodedata.normalize('NFKC', org).lower()
+    return ' '.join(PUNCTUATION_PATTERN.sub('', org).split())
+
+def clean_escaped_text(text, drop_start_time=False):
+    """
+    Clean text taken from escaped JSON dumps of scraper responses
+
+    Drops backslashes, u00XX unicode escape remnants and email artifacts
+    (and with drop_start_time everything from 'Aanvang:' on), then
+    collapses whitespace.
+    """
+    if not text:
+        return ""
+    pattern = ESCAPED_START_TIME_PATTERN if drop_start_time else ESCAPED_PATTERN
+    return ' '.join(pattern.sub('', text).split())
+
+def clean_export_field(text):
+    """
+    Clean a field for CSV export
+
+    Escaped line breaks become spaces, escaped quotes and backslashes are
+    unescaped and 'i.s.m:' collaboration prefixes removed.
+    """
+    if not text:
+        return ""
+    if '\\' in text or 'i.s.m:' in text:
+        text = EXPORT_FIELD_PATTERN.sub(lambda match: EXPORT_FIELD_REPLACEMENTS.get(match.group(), ''), text)
+    return ' '.join(text.split())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Change feed of the matches collection
+
+Every sync appends compact records of what it changed to `match_changes`:
+  - added: a new match (or one that is back on the calendar)
+  - status_changed: registration_text changed ('vanaf 22-06-2025 19:00' -> 'inschrijven', closed, ...)
+  - updated: other fields changed, their names are listed
+  - removed: the match is no longer on the calendar
+
+Records carry a sequence number that only ever increases, zero-padded it
+is also their document ID. A client or notification job keeps the last
+sequence it has handled and reads `sequence > cursor` instead of the whole
+calendar. Records are written in the same transaction that advances one
+counter document, so sequence numbers are handed out in commit order: a
+record is never visible before the records with lower numbers, also
+when several runs record changes at the same time.
+
+Only changes whose match writes landed are recorded. A record carries
+the generation of its run (match_sync.py); when that generation is not
+published yet, readers see the change once it is.
+"""
+
+from datetime import datetime
+
+from google.cloud import firestore
+
+from match_sync import changed_fields
+
+CHANGES_COLLECTION = 'match_changes'
+SEQUENCE_COLLECTION = 'match_change_sequence'
+SEQUENCE_DOCUMENT = 'current'
+
+# Records per transaction: Firestore commits at most 500 writes, one of them is the counter
+RECORDS_PER_TRANSACTION = 499
+
+# Match fields copied into every record, enough to notify without reading the match
+SUMMARY_FIELDS = ('date', 'organizer', 'location', 'calendar_type', 'type', 'registration_text')
+
+def change_record(operation, doc_id, data, previous):
+    """The change record of a sync operation (match_sync.diff_matches), None when nothing changed"""
+    if operation == 'inserted' or (operation == 'updated' and previous.get('retired_generation') is not None):
+        kind, source = 'added', data
+    elif operation == 'deleted':
+        if previous.get('retired_generation') is not None:
+            return None  # Retired by a run that did not publish, its removal is recorded already
+        kind, source = 'removed', previous
+    elif operation == 'updated':
+        source = data
+        kind = 'status_changed' if previous.get('registration_text') != data.get('registration_text') else 'updated'
+    else:
+        return None
+
+    record = {'kind': kind, 'match_id': doc_id}
+    record.update({field: source.get(field) for field in SUMMARY_FIELDS})
+    if kind == 'status_changed':
+        record['previous_registration_text'] = previous.get('registration_text')
+    if kind in ('status_changed', 'updated'):
+        record['fields'] = changed_fields(previous, data)
+    return record
+
+def append_records(db, records, generation=None, created_at=None):
+    """Write records under the next sequence numbers in one transaction, returns the last number"""
+    counter = db.collection(SEQUENCE_COLLECTION).document(SEQUENCE_DOCUMENT)
+    changes = db.collection(CHANGES_COLLECTION)
+    created_at = created_at or datetime.now()
+
+    @firestore.transactional
+    def append(transaction):
+        snapshot = counter.get(transaction=transaction)
+        last = (snapshot.to_dict() or {}).get('last', 0) if snapshot.exists else 0
+        for sequence, record in enumerate(records, start=last + 1):
+            transaction.set(changes.document(f"{sequence:012d}"), dict(
+                record,
+                sequence=sequence,
+                generation=generation,
+                created_at=created_at
+            ))
+        transaction.set(counter, {'last': last + len(records), 'updated_at': created_at})
+        return last + len(records)
+
+    return append(db.transaction())
+
+def emit_changes(db, records, generation=None):
+    """Append records to the change feed, returns the last sequence number written (None when none)"""
+    if not db or not records:
+        return None
+
+    last = None
+    written = 0
+    created_at = datetime.now()
+    try:
+        for start in range(0, len(records), RECORDS_PER_TRANSACTION):
+            chunk = records[start:start + RECORDS_PER_TRANSACTION]
+            last = append_records(db, chunk, generation, created_at)
+            written += len(chunk)
+        print(f"📰 Recorded {written} match changes (up to sequence {last})")
+    except Exception as e:
+        print(f"⚠️ Error recording match changes ({written} of {len(records)} recorded): {e}")
+    return last
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Date parsing for calendar cells
+Calendar dates ("12-07-2025") and registration openings ("vanaf 22-06-2025 19:00")
+
+Each format is recognised by one precompiled regex and the date is built
+from its groups directly, instead of trying strptime() formats in turn and
+paying for an exception at every miss. A calendar repeats the same dates
+many times, so both parsers are cached.
+"""
+
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+# ORWEJA shows dates and opening times in Dutch local time
+ORWEJA_TIMEZONE = ZoneInfo('Europe/Amsterdam')
+
+# 12-07-2025, 12/07/2025, 12-07-25 (same separator twice)
+DAY_FIRST_PATTERN = re.compile(r'(\d{1,2})([-/])(\d{1,2})\2(\d{4}|\d{2})')
+# 2025-07-12, 2025/07/12
+YEAR_FIRST_PATTERN = re.compile(r'(\d{4})([-/])(\d{1,2})\2(\d{1,2})')
+REGISTRATION_OPENS_PATTERN = re.compile(
+    r'vanaf\s+(\d{1,2})-(\d{1,2})-(\d{4})(?:\s+(\d{1,2})[:.](\d{2}))?', re.IGNORECASE
+)
+
+def _full_year(year_text):
+    """Two-digit years pivot like strptime's %y (69-99 -> 19xx, 00-68 -> 20xx)"""
+    year = int(year_text)
+    if len(year_text) == 2:
+        year += 1900 if year >= 69 else 2000
+    return year
+
+@lru_cache(maxsize=4096)
+def parse_calendar_date(text):
+    """The date of a calendar cell, None when the text is no (valid) date"""
+    if not text:
+        return None
+    text = text.strip()
+
+    try:
+        match = DAY_FIRST_PATTERN.fullmatch(text)
+        if match:
+            day, _, month, year = match.groups()
+            return date(_full_year(year), int(month), int(day))
+
+        match = YEAR_FIRST_PATTERN.fullmatch(text)
+        if match:
+            year, _, month, day = match.groups()
+            return date(int(year), int(month), int(day))
+    except ValueError:
+        # Matches the pattern but doesn't exist, e.g. 31-02-2025
+        pass
+
+    return None
+
+@lru_cache(maxsize=4096)
+def parse_registration_opening(registration_text):
+    """Parse 'vanaf DD-MM-YYYY HH:MM' into an aware datetime, None when absent"""
+    if not registration_text:
+        return None
+
+    match = REGISTRATION_OPENS_PATTERN.search(registration_text)
+    if not match:
+        return None
+
+    day, month, year, hour, minute = match.groups()
+    try:
+        return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), tzinfo=ORWEJA_TIMEZONE)
+    except ValueError:
+        return None
+
+def day_start(match_date):
+    """Midnight (Dutch local time) at the start of a calendar date, how match dates are stored as Timestamps"""
+    return datetime(match_date.year, match_date.month, match_date.day, tzinfo=ORWEJA_TIMEZONE)
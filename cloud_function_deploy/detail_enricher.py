@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Registration detail enrichment
+Follows the registration_url of each match and extracts extra fields
+(capacity, registration closing time, entry fee)
+
+Detail pages are fetched with a bounded worker pool and a per-host rate
+limit, and every result is cached in Firestore by URL with a TTL, so a
+run only fetches pages it has not seen recently.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+DETAIL_CACHE_COLLECTION = 'registration_details'
+
+ENRICH_MAX_WORKERS = int(os.environ.get('ENRICH_MAX_WORKERS', '4'))
+# Requests per second per host, keeps us polite towards ORWEJA
+ENRICH_RATE_PER_HOST = float(os.environ.get('ENRICH_RATE_PER_HOST', '2'))
+DETAIL_CACHE_TTL_HOURS = float(os.environ.get('DETAIL_CACHE_TTL_HOURS', '24'))
+
+CAPACITY_PATTERNS = [
+    re.compile(r'(?:maximaal|max\.?)\s*(\d{1,3})\s*(?:deelnemers|honden|combinaties|inschrijvingen|plaatsen)', re.IGNORECASE),
+    re.compile(r'(?:aantal\s+plaatsen|capaciteit|max(?:imum)?\s+aantal\s+deelnemers)\s*:?\s*(\d{1,3})', re.IGNORECASE),
+]
+AVAILABLE_PATTERN = re.compile(r'(?:nog\s+)?(\d{1,3})\s*(?:plaatsen\s+)?(?:beschikbaar|vrij)', re.IGNORECASE)
+CLOSING_PATTERN = re.compile(
+    r'(?:inschrijving\s+sluit|sluiting\s+inschrijving|inschrijven\s+tot|sluitingsdatum)\D{0,20}?'
+    r'(\d{1,2})-(\d{1,2})(?:-(\d{4}))?(?:\s+(?:om\s+)?(\d{1,2})[:.](\d{2}))?',
+    re.IGNORECASE
+)
+FEE_PATTERN = re.compile(r'(?:inschrijfgeld|kosten|prijs)\D{0,20}?€\s*(\d+(?:[.,]\d{2})?)', re.IGNORECASE)
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1/rate seconds apart (thread-safe)"""
+
+    def __init__(self, rate_per_second=ENRICH_RATE_PER_HOST):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def _cache_doc_id(url):
+    """URLs contain '/', which Firestore doc IDs can't"""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+
+def parse_detail_page(content, reference_year=None):
+    """Extract the registration details we know how to recognise"""
+    soup = BeautifulSoup(content, 'html.parser')
+    text = re.sub(r'\s+', ' ', soup.get_text(separator=' ', strip=True))
+    reference_year = reference_year or datetime.now().year
+
+    details = {}
+
+    for pattern in CAPACITY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            details['capacity'] = int(match.group(1))
+            break
+
+    match = AVAILABLE_PATTERN.search(text)
+    if match:
+        details['places_available'] = int(match.group(1))
+
+    match = CLOSING_PATTERN.search(text)
+    if match:
+        day, month, year, hour, minute = match.groups()
+        try:
+            closes_at = datetime(int(year or reference_year), int(month), int(day), int(hour or 23), int(minute or 59))
+            details['registration_closes_at'] = closes_at.isoformat()
+        except ValueError:
+            pass
+
+    match = FEE_PATTERN.search(text)
+    if match:
+        details['entry_fee'] = float(match.group(1).replace(',', '.'))
+
+    return details
+
+def _load_cached_details(db, url):
+    """Return cached details for url when still within the TTL"""
+    if not db:
+        return None
+
+    try:
+        doc = db.collection(DETAIL_CACHE_COLLECTION).document(_cache_doc_id(url)).get()
+        if not doc.exists:
+            return None
+        cached = doc.to_dict()
+        if time.time() - cached.get('fetched_at', 0) > DETAIL_CACHE_TTL_HOURS * 3600:
+            return None
+        return cached.get('details', {})
+    except Exception as e:
+        print(f"⚠️ Error reading detail cache for {url}: {e}")
+        return None
+
+def _store_cached_details(db, url, details, content_hash):
+    if not db:
+        return
+
+    try:
+        db.collection(DETAIL_CACHE_COLLECTION).document(_cache_doc_id(url)).set({
+            'url': url,
+            'details': details,
+            'content_hash': content_hash,
+            'fetched_at': time.time()
+        })
+    except Exception as e:
+        print(f"⚠️ Error writing detail cache for {url}: {e}")
+
+def enrich_matches(session, matches, db=None, max_workers=None):
+    """
+    Add 'registration_details' to every match with a registration_url
+
+    Returns stats with the number of unique URLs, cache hits, fetched
+    pages and errors. Matches whose detail page fails are left unchanged.
+    """
+    stats = {'urls': 0, 'cache_hits': 0, 'fetched': 0, 'errors': 0}
+
+    urls = []
+    for match in matches:
+        url = match.get('registration_url')
+        if url and url not in urls:
+            urls.append(url)
+
+    stats['urls'] = len(urls)
+    if not urls:
+        return stats
+
+    max_workers = max(1, min(max_workers or ENRICH_MAX_WORKERS, len(urls)))
+    rate_limiter = HostRateLimiter()
+    stats_lock = threading.Lock()
+
+    print(f"🔎 Enriching {len(urls)} registration pages (workers: {max_workers})")
+    started = time.time()
+
+    def fetch_details(url):
+        cached = _load_cached_details(db, url)
+        if cached is not None:
+            with stats_lock:
+                stats['cache_hits'] += 1
+            return url, cached
+
+        try:
+            rate_limiter.wait(url)
+            response = session.get(url)
+            response.raise_for_status()
+
+            details = parse_detail_page(response.content)
+            _store_cached_details(db, url, details, hashlib.sha256(response.content).hexdigest())
+            with stats_lock:
+                stats['fetched'] += 1
+            return url, details
+
+        except Exception as e:
+            print(f"⚠️ Error fetching registration details {url}: {e}")
+            with stats_lock:
+                stats['errors'] += 1
+            return url, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        details_by_url = dict(executor.map(fetch_details, urls))
+
+    for match in matches:
+        details = details_by_url.get(match.get('registration_url'))
+        if details:
+            match['registration_details'] = details
+
+    print(f"✅ Enrichment done in {time.time() - started:.2f}s "
+          f"({stats['cache_hits']} cached, {stats['fetched']} fetched, {stats['errors']} errors)")
+    return stats
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Batched Firestore writer
+
+Collects set/update/delete mutations into WriteBatch commits of up to 500
+operations (the Firestore limit per commit) instead of one round trip per
+document. Full batches are committed on a small thread pool while the
+next batch is filled; at most max_in_flight commits run at once, so a long
+run is throttled instead of queueing batches without bound.
+
+A batch is committed atomically: when a commit fails all its operations
+count as failed. An operation can carry a tag, the tags of the operations
+that landed are collected in `committed` (e.g. to report only the changes
+that were written). Commits in flight may finish in any order, so call
+flush() between mutations of the same document (e.g. clearing a
+collection and then writing it again).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Firestore accepts at most 500 operations per commit
+FIRESTORE_BATCH_SIZE = 500
+# WriteBatch commits in flight at once
+FIRESTORE_COMMIT_CONCURRENCY = int(os.environ.get('FIRESTORE_COMMIT_CONCURRENCY', '4'))
+
+class BatchedWriter:
+    """Firestore mutations grouped into WriteBatch commits, with per-run throughput stats"""
+
+    def __init__(self, db, batch_size=FIRESTORE_BATCH_SIZE, max_in_flight=FIRESTORE_COMMIT_CONCURRENCY):
+        self.db = db
+        self.batch_size = max(1, min(batch_size, FIRESTORE_BATCH_SIZE))
+        self.max_in_flight = max(1, max_in_flight)
+        self.stats = {'writes': 0, 'commits': 0, 'errors': 0}
+        self.committed = []
+
+        self._batch = None
+        self._pending = 0
+        self._tags = []
+        self._in_flight = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight) if self.max_in_flight > 1 else None
+        self._started = time.time()
+
+    def set(self, reference, data, merge=False, tag=None):
+        self._current_batch().set(reference, data, merge=merge)
+        self._added(tag)
+
+    def update(self, reference, data, tag=None):
+        self._current_batch().update(reference, data)
+        self._added(tag)
+
+    def delete(self, reference, tag=None):
+        self._current_batch().delete(reference)
+        self._added(tag)
+
+    def flush(self):
+        """Commit the pending operations and wait until every commit in flight is done"""
+        self._commit_pending()
+        wait(self._in_flight)
+        self._in_flight = []
+
+    def close(self):
+        """Flush, stop the commit threads and return the run stats"""
+        self.flush()
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+        seconds = time.time() - self._started
+        stats = dict(self.stats, seconds=round(seconds, 3))
+        stats['writes_per_second'] = round(stats['writes'] / seconds, 1) if seconds > 0 else None
+        if stats['writes'] or stats['errors']:
+            print(f"📦 Firestore writes: {stats['writes']} in {stats['commits']} commits "
+                  f"({stats['writes_per_second']}/s), {stats['errors']} failed")
+        return stats
+
+    def _current_batch(self):
+        if self._batch is None:
+            self._batch = self.db.batch()
+        return self._batch
+
+    def _added(self, tag):
+        self._pending += 1
+        if tag is not None:
+            self._tags.append(tag)
+        if self._pending >= self.batch_size:
+            self._commit_pending()
+
+    def _commit_pending(self):
+        batch, count, tags = self._batch, self._pending, self._tags
+        self._batch, self._pending, self._tags = None, 0, []
+        if not count:
+            return
+
+        if self._executor is None:
+            self._commit(batch, count, tags)
+            return
+
+        # Throttle: wait for a free slot before handing over another batch
+        self._in_flight = [future for future in self._in_flight if not future.done()]
+        if len(self._in_flight) >= self.max_in_flight:
+            wait(self._in_flight, return_when=FIRST_COMPLETED)
+        self._in_flight.append(self._executor.submit(self._commit, batch, count, tags))
+
+    def _commit(self, batch, count, tags):
+        try:
+            batch.commit()
+            with self._lock:
+                self.stats['writes'] += count
+                self.stats['commits'] += 1
+                self.committed.extend(tags)
+        except Exception as e:
+            print(f"❌ Error committing {count} Firestore writes: {e}")
+            with self._lock:
+                self.stats['errors'] += count
@@ -10,6 +10,8 @@ import json
 from datetime import datetime, timedelta
 import firebase_admin
 from firebase_admin import credentials, firestore
+from firestore_writer import BatchedWriter
+from match_sync import match_document_id
 
 # Set up environment
 os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = '/Users/florisvanderhart/Documents/jachtproef_alert/scraper-service-account.json'
@@ -92,27 +94,31 @@ def force_upload_to_firebase(db, matches):
     """Force upload matches to Firebase"""
     print("💾 Force uploading sample matches to Firestore...")
     
-    # Clear existing matches first
+    matches_collection = db.collection('matches')
+    writer = BatchedWriter(db)
+    
+    # Content-addressed document IDs, the same ones the scraper sync uses
+    documents = {match_document_id(match): match for match in matches}
+    
+    # Clear the other existing matches first, documents being uploaded are overwritten
+    deleted = 0
     try:
-        existing_matches = db.collection('matches').stream()
-        for match in existing_matches:
-            match.reference.delete()
-        print("🗑️ Cleared existing matches")
+        for match in matches_collection.stream():
+            if match.id not in documents:
+                writer.delete(match.reference)
+                deleted += 1
+        print(f"🗑️ Cleared {deleted} existing matches")
     except Exception as e:
         print(f"⚠️ Error clearing existing matches: {e}")
     
-    # Upload new matches
-    success_count = 0
-    for match in matches:
-        try:
-            # Add to Firestore
-            doc_ref = db.collection('matches').add(match)
-            print(f"➕ Added: {match['organizer']} - {match['type']} - {match['date']}")
-            success_count += 1
-        except Exception as e:
-            print(f"❌ Error uploading match {match.get('organizer', 'Unknown')}: {e}")
+    # Upload new matches in 500-document batches
+    for doc_id, match in documents.items():
+        writer.set(matches_collection.document(doc_id), match)
+        print(f"➕ Added: {match['organizer']} - {match['type']} - {match['date']}")
+    
+    success_count = writer.close()['writes'] - deleted
     
-    print(f"✅ Successfully uploaded {success_count}/{len(matches)} matches to Firestore")
+    print(f"✅ Successfully uploaded {success_count}/{len(documents)} matches to Firestore")
     return success_count
 
 def test_firebase_write_permissions(db):
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Fuzzy string index for organizer and location names
+
+Strings are normalized (normalize_organizer) and split into character
+trigrams; an inverted index maps every trigram to the strings holding it.
+A query scores candidates by the Dice coefficient of the trigram sets
+(2 * shared / (query + candidate trigrams)) and returns the top k.
+
+Lookups don't scan the whole index: a candidate can only reach min_score
+when it shares enough trigrams with the query, so only the postings of the
+query's rarest trigrams are read to collect candidates (prefix filtering),
+and just those candidates are scored. Results are exact for min_score.
+"""
+
+import heapq
+import math
+from functools import lru_cache
+
+from cell_cleaner import normalize_organizer
+
+@lru_cache(maxsize=8192)
+def trigrams(text):
+    """Character trigrams of a string, padded so short words and word starts count"""
+    if not text:
+        return frozenset()
+    padded = f"  {text} "
+    return frozenset(padded[index:index + 3] for index in range(len(padded) - 2))
+
+def dice(grams, other):
+    if not grams or not other:
+        return 0.0
+    return 2 * len(grams & other) / (len(grams) + len(other))
+
+def trigram_similarity(a, b, normalize=normalize_organizer):
+    """Dice similarity (0..1) of the trigrams of two normalized strings"""
+    if not a or not b:
+        return 0.0
+    if normalize:
+        a, b = normalize(a), normalize(b)
+    return dice(trigrams(a), trigrams(b))
+
+class FuzzyIndex:
+    """Trigram index over strings, each string carrying the items added with it"""
+
+    def __init__(self, normalize=normalize_organizer):
+        self.normalize = normalize
+        self._texts = []
+        self._grams = []
+        self._items = []
+        self._ids = {}
+        self._postings = {}
+
+    def __len__(self):
+        return sum(len(items) for items in self._items)
+
+    def add(self, text, item=None):
+        """Index text, item (default: the text itself) is what queries return"""
+        key = self.normalize(text) if self.normalize and text else (text or '')
+        text_id = self._ids.get(key)
+        if text_id is None:
+            text_id = len(self._texts)
+            self._ids[key] = text_id
+            self._texts.append(key)
+            self._grams.append(trigrams(key))
+            self._items.append([])
+            for gram in self._grams[text_id]:
+                self._postings.setdefault(gram, []).append(text_id)
+        self._items[text_id].append(text if item is None else item)
+
+    def query(self, text, k=5, min_score=0.5):
+        """
+        The k best (score, item) pairs with score >= min_score, best first
+
+        k=None returns every item reaching min_score. Items of equally
+        scored strings come in the order they were added.
+        """
+        key = self.normalize(text) if self.normalize and text else (text or '')
+        grams = trigrams(key)
+        if not grams:
+            return []
+
+        # A string with Dice >= min_score shares at least min_overlap trigrams with the
+        # query, so it holds one of the (len - min_overlap + 1) rarest query trigrams
+        min_overlap = max(1, math.ceil(min_score * len(grams) / (2 - min_score) - 1e-9))
+        rarest = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:len(grams) - min_overlap + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        scored = []
+        for text_id in candidates:
+            score = dice(grams, self._grams[text_id])
+            if score >= min_score:
+                scored.append((-score, text_id))
+
+        results = []
+        ranked = sorted(scored) if k is None else heapq.nsmallest(k, scored)
+        for negative_score, text_id in ranked:
+            for item in self._items[text_id]:
+                results.append((-negative_score, item))
+                if k is not None and len(results) == k:
+                    return results
+        return results
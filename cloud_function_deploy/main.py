@@ -4,9 +4,9 @@ JachtProef Alert - ORWEJA Scraper Cloud Function
 Deployed version with real ORWEJA scraping (not test data)
 """
 
-import requests
 from bs4 import BeautifulSoup
 import json
+import hashlib
 import firebase_admin
 from firebase_admin import credentials, firestore
 from datetime import datetime, timedelta
@@ -14,15 +14,54 @@ import re
 import os
 from difflib import SequenceMatcher
 import time
+import asyncio
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import functions_framework
 import csv
 import io
 from google.cloud import storage
+from scraper_state import load_state, save_state, clear_state
+from orweja_transport import create_session
+from scrape_scheduler import take_due_slots, replan_schedule
+from detail_enricher import enrich_matches
+from calendar_html import iter_calendar_rows, table_rows, STREAM_CHUNK_SIZE
+from cell_cleaner import clean_cell, clean_location, collapse_whitespace
+from match_types import classify_match_type, MATCH_TYPE_RULES
+from row_cache import ROW_CACHE_ENABLED, row_hash, load_row_cache, store_row_cache
+from date_parsing import ORWEJA_TIMEZONE, day_start, parse_calendar_date, parse_registration_opening
+from tier_matching import build_date_index
+from match_sync import (
+    MATCHES_COLLECTION,
+    collect_retired_matches,
+    current_version,
+    diff_matches,
+    fold_staged_matches,
+    hold_generation,
+    load_generation_pointer,
+    new_sync_stats,
+    publish_generation,
+    staged_update,
+    sync_succeeded,
+)
+from firestore_writer import BatchedWriter
+from change_feed import change_record, emit_changes
 
 # ORWEJA CREDENTIALS for protected calendar access
 ORWEJA_USERNAME = "Jacqueline vd Hart-Snelle"
 ORWEJA_PASSWORD = "Jindi11Leia"
 
+# ORWEJA host; point ORWEJA_BASE_URL at orweja_standin.py to run without network access
+ORWEJA_BASE_URL = os.environ.get('ORWEJA_BASE_URL', 'https://my.orweja.nl').rstrip('/')
+ORWEJA_LOGIN_URL = f"{ORWEJA_BASE_URL}/login"
+
+# Protected page used to verify the login; its body doubles as that calendar's result
+ORWEJA_CHECK_URL = f"{ORWEJA_BASE_URL}/home/kalender/1"
+
+# Authenticated cookies are cached in Firestore between runs (scraper_state, closed to clients in firestore.rules)
+ORWEJA_SESSION_STATE_KEY = 'orweja_session'
+ORWEJA_SESSION_TTL_HOURS = float(os.environ.get('ORWEJA_SESSION_TTL_HOURS', '12'))
+
 # Initialize Firebase
 db = None
 
@@ -44,19 +83,12 @@ def similarity(a, b):
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
 def parse_date(date_text):
-    """Parse date from various formats"""
-    try:
-        # Handle DD-MM-YYYY format (ORWEJA format)
-        if re.match(r'\d{1,2}-\d{1,2}-\d{4}', date_text):
-            return datetime.strptime(date_text, '%d-%m-%Y').date()
-        # Handle DD-MM-YYYY format with leading zeros
-        elif re.match(r'\d{2}-\d{2}-\d{4}', date_text):
-            return datetime.strptime(date_text, '%d-%m-%Y').date()
-        # Handle other formats as needed
-        return datetime.now().date()
-    except Exception as e:
-        print(f"⚠️ Error parsing date '{date_text}': {e}")
-        return datetime.now().date()
+    """Parse a calendar date (DD-MM-YYYY and the other date_parsing formats), None when it is no date"""
+    match_date = parse_calendar_date(date_text)
+    if match_date is None:
+        # Used to fall back to today, which turned broken rows into matches happening today
+        print(f"⚠️ Error parsing date '{date_text}'")
+    return match_date
 
 # ====================================================================
 # ARCHIVED: Tier 1 Scraper (No longer used - July 2025)
@@ -81,11 +113,8 @@ def scrape_tier1_public_calendar_ARCHIVED():
     url = "https://my.orweja.nl/widget/kalender/"
     
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
+        # The shared transport sets the User-Agent, timeouts and retries
+        response = create_session().get(url)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -163,16 +192,195 @@ def scrape_tier1_public_calendar_ARCHIVED():
         print(f"❌ Tier 1 scraping error: {e}")
         return []
 
-def authenticate_orweja():
-    """Authenticate with ORWEJA for protected calendar access"""
+# ====================================================================
+# Public calendar probe (cheap change detection)
+# ====================================================================
+# The public widget lists every match without logging in. Hashing its
+# (date, organizer, registration status) tuples tells us whether anything
+# changed since the last full scrape, so frequent probe runs only pay for
+# the login and the three protected calendars when there is news.
+# ====================================================================
+
+PUBLIC_CALENDAR_URL = f"{ORWEJA_BASE_URL}/widget/kalender/"
+PUBLIC_PROBE_STATE_KEY = 'public_probe'
+
+def extract_public_calendar_rows(content):
+    """Extract (date, organizer, registration status) tuples from the public widget"""
+    rows = []
+    
+    for entry in table_rows(content):
+        cells = entry.find_all('td')
+        if len(cells) < 4:
+            continue
+            
+        date_text = cells[0].get_text(strip=True)
+        if not re.match(r'\d{1,2}-\d{1,2}-\d{4}', date_text):
+            continue
+            
+        organizer = collapse_whitespace(cells[2].get_text(separator=' ', strip=True))
+        # Registration status is always the last column
+        reg_status = collapse_whitespace(cells[-1].get_text(separator=' ', strip=True)).lower()
+        
+        rows.append((date_text, organizer, reg_status))
+        
+    return rows
+
+def public_calendar_fingerprint(rows):
+    """Order-independent SHA-256 fingerprint of the public calendar rows"""
+    digest = hashlib.sha256()
+    for row in sorted(rows):
+        digest.update('\x1f'.join(row).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+def probe_public_calendar():
+    """
+    Fetch the public widget and compare its fingerprint with the last run
+    
+    Returns a dict with the new fingerprint, the row count and whether the
+    calendar changed. Any probe failure counts as changed, so a broken
+    widget never hides real changes from the full scrape.
+    """
+    print("🔍 Probing public calendar for changes...")
+    
+    probe = {
+        'fingerprint': None,
+        'rows': 0,
+        'changed': True
+    }
+    
+    try:
+        response = create_session().get(PUBLIC_CALENDAR_URL)
+        response.raise_for_status()
+        
+        rows = extract_public_calendar_rows(response.content)
+        if not rows:
+            print("⚠️ Public calendar probe found no rows - treating as changed")
+            return probe
+            
+        probe['rows'] = len(rows)
+        probe['fingerprint'] = public_calendar_fingerprint(rows)
+        
+        previous = load_state(db, PUBLIC_PROBE_STATE_KEY)
+        probe['changed'] = previous.get('fingerprint') != probe['fingerprint']
+        
+        if probe['changed']:
+            print(f"🆕 Public calendar changed ({len(rows)} rows)")
+        else:
+            print(f"💤 Public calendar unchanged ({len(rows)} rows)")
+            
+        return probe
+        
+    except Exception as e:
+        print(f"⚠️ Public calendar probe failed: {e} - treating as changed")
+        return probe
+
+def save_probe_fingerprint(probe):
+    """Remember the probed fingerprint once the full scrape has been stored"""
+    if probe and probe.get('fingerprint'):
+        save_state(db, PUBLIC_PROBE_STATE_KEY, {
+            'fingerprint': probe['fingerprint'],
+            'rows': probe['rows']
+        })
+
+def _is_logged_in_response(response):
+    """Check that a protected page response is real content and not the login page"""
+    # Check if we're redirected to login page (login failed)
+    if "login" in response.url.lower():
+        print("❌ Still redirected to login page - authentication failed")
+        return False
+        
+    # Check if we got actual content (not just login page)
+    if len(response.content) <= 10000:  # Should be substantial content
+        print(f"⚠️ Got small response ({len(response.content)} chars) - may not be logged in")
+        return False
+        
+    return True
+
+def load_cached_session():
+    """Restore the ORWEJA session cookies stored by a previous run"""
+    cached = load_state(db, ORWEJA_SESSION_STATE_KEY)
+    cookies = cached.get('cookies')
+    saved_at = cached.get('saved_at')
+    
+    if not cookies or not saved_at:
+        return None
+        
+    # Cheap local check first: no round trip when the cache is clearly stale
+    saved_at = datetime.fromtimestamp(saved_at)
+    if datetime.now() - saved_at > timedelta(hours=ORWEJA_SESSION_TTL_HOURS):
+        print(f"⌛ Cached ORWEJA session expired (saved {saved_at.isoformat()})")
+        return None
+        
+    now = time.time()
+    if any(cookie.get('expires') and cookie['expires'] < now for cookie in cookies):
+        print("⌛ Cached ORWEJA session cookies expired")
+        return None
+        
+    session = create_session()
+    for cookie in cookies:
+        session.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie.get('domain', ''),
+            path=cookie.get('path', '/'),
+            expires=cookie.get('expires'),
+            secure=cookie.get('secure', False)
+        )
+        
+    print(f"🍪 Restored cached ORWEJA session ({len(cookies)} cookies, saved {saved_at.isoformat()})")
+    return session
+
+def save_session_cache(session):
+    """Store the authenticated session cookies for the next run"""
+    cookies = [
+        {
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure
+        }
+        for cookie in session.cookies
+    ]
+    
+    if save_state(db, ORWEJA_SESSION_STATE_KEY, {'cookies': cookies, 'saved_at': time.time()}):
+        print(f"💾 Cached ORWEJA session ({len(cookies)} cookies)")
+
+def open_orweja_session():
+    """
+    Open an authenticated ORWEJA session
+    
+    Reuses the cookies of a previous run when they are still valid and only
+    logs in again when they are not. Returns (session, check_page) where
+    check_page is the body of the protected page used to verify the login
+    (ORWEJA_CHECK_URL), so callers don't have to download it a second time.
+    Returns (None, None) when authentication failed.
+    """
+    session = load_cached_session()
+    if session:
+        try:
+            test_response = session.get(ORWEJA_CHECK_URL)
+            print(f"📊 Cached session check status: {test_response.status_code}")
+            
+            if test_response.ok and _is_logged_in_response(test_response):
+                print("✅ ORWEJA cached session still valid - skipping login")
+                return session, test_response.content
+        except Exception as e:
+            print(f"⚠️ Cached session check failed: {e}")
+            
+        print("🔁 Cached ORWEJA session no longer valid - logging in again")
+        clear_state(db, ORWEJA_SESSION_STATE_KEY)
+        
     print("🔐 Authenticating with ORWEJA...")
     
-    session = requests.Session()
+    session = create_session()
     
     try:
         # Get login page
-        login_url = "https://my.orweja.nl/login"
-        response = session.get(login_url, timeout=30)
+        login_url = ORWEJA_LOGIN_URL
+        response = session.get(login_url)
         response.raise_for_status()
         
         # Parse login form to get correct field names
@@ -181,8 +389,8 @@ def authenticate_orweja():
         
         if not login_form:
             print("❌ No login form found")
-            return None
-        
+            return None, None
+            
         # Find form inputs to get correct field names
         inputs = login_form.find_all('input')
         username_field = None
@@ -195,11 +403,11 @@ def authenticate_orweja():
                 username_field = name
             elif type_attr == 'password':
                 password_field = name
-        
+                
         if not username_field or not password_field:
             print(f"❌ Could not find username/password fields. Found: username={username_field}, password={password_field}")
-            return None
-        
+            return None, None
+            
         print(f"🔑 Using field names: {username_field}, {password_field}")
         
         # Login data with correct field names
@@ -209,261 +417,701 @@ def authenticate_orweja():
         }
         
         # Submit login
-        response = session.post(login_url, data=login_data, timeout=30, allow_redirects=True)
+        response = session.post(login_url, data=login_data, allow_redirects=True)
         
         print(f"📊 Login response status: {response.status_code}")
         
         # Check if login was successful by trying to access a protected page
-        test_url = "https://my.orweja.nl/home/kalender/1"
-        test_response = session.get(test_url, timeout=30)
+        test_response = session.get(ORWEJA_CHECK_URL)
         
         print(f"📊 Test protected page status: {test_response.status_code}")
         
-        # Check if we're redirected to login page (login failed)
-        if "login" in test_response.url.lower():
-            print("❌ Still redirected to login page - authentication failed")
-            return None
-        
-        # Check if we got actual content (not just login page)
-        if len(test_response.content) > 10000:  # Should be substantial content
-            print("✅ ORWEJA authentication successful - got substantial content")
-            return session
-        else:
-            print(f"⚠️ Got small response ({len(test_response.content)} chars) - may not be logged in")
-            return None
+        if not _is_logged_in_response(test_response):
+            return None, None
             
+        print("✅ ORWEJA authentication successful - got substantial content")
+        save_session_cache(session)
+        return session, test_response.content
+        
     except Exception as e:
         print(f"❌ ORWEJA authentication error: {e}")
+        return None, None
+
+def authenticate_orweja():
+    """Authenticate with ORWEJA for protected calendar access"""
+    session, _ = open_orweja_session()
+    return session
+
+# Calendar definitions with corrected field mappings
+TIER2_CALENDARS = [
+    {
+        'name': 'Veldwedstrijd',
+        'url': f'{ORWEJA_BASE_URL}/home/kalender/0',
+        'calendar_type': 'Veldwedstrijd'
+    },
+    {
+        'name': 'Jachthondenproef',
+        'url': f'{ORWEJA_BASE_URL}/home/kalender/1',
+        'calendar_type': 'Jachthondenproef'
+    },
+    {
+        'name': 'ORWEJA Werktest',
+        'url': f'{ORWEJA_BASE_URL}/home/kalender/2',
+        'calendar_type': 'ORWEJA Werktest'
+    }
+]
+
+# Maximum number of calendar pages fetched at the same time.
+# Set ORWEJA_MAX_CONCURRENCY=1 to fall back to one-by-one fetching.
+MAX_CALENDAR_CONCURRENCY = int(os.environ.get('ORWEJA_MAX_CONCURRENCY', '3'))
+
+# Parse workers of the fetch/parse pipeline. Parsing is CPU bound, set
+# ORWEJA_PARSE_PROCESSES=true to parse in a process pool (one core each).
+PARSE_WORKERS = int(os.environ.get('ORWEJA_PARSE_WORKERS', '2'))
+PARSE_IN_PROCESSES = os.environ.get('ORWEJA_PARSE_PROCESSES', 'false').lower() == 'true'
+
+def parse_calendar_page(content, calendar):
+    """Parse the match rows of one protected calendar page"""
+    return list(iter_calendar_matches(iter_calendar_rows(content), calendar))
+
+def iter_calendar_matches(rows, calendar, row_cache=None):
+    """
+    Turn calendar rows into matches, one match at a time
+    
+    rows comes from calendar_html.iter_calendar_rows(), which streams them
+    from the page (or its response chunks) when lxml is available, so no
+    DOM or match list is built for the whole calendar. With a row_cache
+    (row_cache.RowParseCache) only rows it has not seen before go through
+    parse_calendar_row().
+    """
+    row_count = 0
+    
+    for cells in rows:
+        row_count += 1
+        if row_count == 1:
+            continue  # Skip header row
+            
+        if row_cache is not None:
+            row_key = row_hash(repr(cells).encode('utf-8'))
+            found, match_data = row_cache.get(row_key)
+            if found:
+                if match_data:
+                    yield match_data
+                continue
+                
+        try:
+            match_data = parse_calendar_row(cells, calendar)
+        except Exception as e:
+            print(f"⚠️ Error parsing row in {calendar['name']}: {e}")
+            continue
+            
+        if row_cache is not None:
+            row_cache.put(row_key, match_data)
+            
+        if match_data:
+            yield match_data
+            
+    if not row_count:
+        print(f"⚠️ No calendar table found for {calendar['name']}")
+
+def parse_calendar_row(cells, calendar):
+    """Build the match record of one calendar row of (text, href) cells, None for non-match rows"""
+    if len(cells) < 4:
+        return None
+        
+    # CORRECTED FIELD MAPPING based on actual ORWEJA structure
+    # Column 0: Date
+    date_text = cells[0][0]
+    if not date_text or not re.match(r'\d{1,2}-\d{1,2}-\d{4}', date_text):
         return None
+        
+    match_date = parse_date(date_text)
+    if not match_date:
+        return None
+        
+    # Column 1: Match type/details (CAC, CACIT, etc.)
+    match_type = cells[1][0]
+    if not match_type:
+        return None
+        
+    # Column 2: Organizer, without email artifacts
+    organizer = clean_cell(cells[2][0])
+    
+    # Column 3: Location, also without the start time
+    location = clean_location(cells[3][0])
+    
+    # Column 5: Registration status and URL (6th column - "Inschrijven")
+    registration_text = ""
+    registration_url = ""
+    if len(cells) > 5:
+        registration_text, href = cells[5]
+        
+        # Enrollment link in this cell
+        if href:
+            # Convert relative URLs to absolute URLs
+            if href.startswith('/'):
+                registration_url = f"{ORWEJA_BASE_URL}{href}"
+            elif href.startswith('http'):
+                registration_url = href
+            else:
+                registration_url = f"{ORWEJA_BASE_URL}/{href}"
+                
+    # Column 4: Remarks/Notes ("Opmerking")
+    remarks_from_column = ""
+    if len(cells) > 4:
+        remarks_from_column = clean_cell(cells[4][0])
+        
+    # Combine remarks from column 4 with any additional columns
+    general_remarks = ""
+    if remarks_from_column and remarks_from_column not in ['', ' ', '-']:
+        general_remarks = remarks_from_column
+        
+    # Column 6+: Check for any additional remarks/notes in remaining columns
+    if len(cells) > 6:
+        for cell_text in (clean_cell(text) for text, _ in cells[6:]):
+            # Skip if this is actually registration status (not a real remark)
+            if cell_text.lower() in ['inschrijven', 'niet mogelijk', 'niet meer mogelijk']:
+                continue
+            if cell_text.lower().startswith('vanaf '):
+                continue
+                
+            if cell_text and cell_text not in ['', ' ', '-']:
+                if general_remarks:
+                    general_remarks += f" | {cell_text}"
+                else:
+                    general_remarks = cell_text
+                    
+    # NORMALIZE MATCH TYPES: Convert to standardized types and acronyms
+    normalized_type, match_details = classify_match_type(match_type, calendar['calendar_type'])
+            
+    # Create match record
+    match_data = {
+        'date': match_date,
+        'organizer': organizer,
+        'location': location,
+        'type': normalized_type,
+        'registration_text': registration_text.lower() if registration_text else 'inschrijven',
+        'calendar_type': calendar['calendar_type'],
+        'source': 'tier2'
+    }
+    
+    # Add registration URL if we found one
+    if registration_url:
+        match_data['registration_url'] = registration_url
+        
+    # Structured opening time of "vanaf 22-06-2025 19:00", so the app doesn't parse the text
+    registration_opens_at = parse_registration_opening(registration_text)
+    if registration_opens_at:
+        match_data['registration_opens_at'] = registration_opens_at
+        
+    # Combine general remarks with qualification details
+    combined_remarks = ""
+    if general_remarks:
+        combined_remarks = general_remarks
+    if match_details:
+        if combined_remarks:
+            combined_remarks += f" | {match_details}"
+        else:
+            combined_remarks = match_details
+            
+    # Add combined remarks if we have any
+    if combined_remarks:
+        match_data['remark'] = combined_remarks
+        
+    return match_data
+    
 
-def scrape_tier2_protected_calendars():
-    """Scrape the three protected calendars with authentication"""
-    print("🔐 Starting Tier 2 scraping (protected calendars)...")
+def _calendar_state_key(calendar):
+    """Scraper state doc holding the fetch validators of a calendar"""
+    return f"calendar_{calendar['url'].rstrip('/').rsplit('/', 1)[-1]}"
+
+# Bump when parse_calendar_row() builds different records for the same row
+ROW_PARSER_VERSION = 2
+# Cached rows are only valid for the parser rules and host that produced them
+ROW_CACHE_FINGERPRINT = hashlib.sha256(
+    repr((ROW_PARSER_VERSION, ORWEJA_BASE_URL, MATCH_TYPE_RULES)).encode('utf-8')
+).hexdigest()[:16]
+
+def load_row_caches(calendars):
+    """Row parse caches by calendar URL, empty when the cache is disabled"""
+    if not ROW_CACHE_ENABLED or not db:
+        return {}
+    return {
+        calendar['url']: load_row_cache(db, _calendar_state_key(calendar), ROW_CACHE_FINGERPRINT)
+        for calendar in calendars
+    }
+
+def save_row_caches(calendar_results):
+    """Store the row caches of the parsed calendars, returns hit/miss totals (None when disabled)"""
+    caches = [(r['calendar'], r['row_cache']) for r in calendar_results if r.get('row_cache') is not None]
+    if not caches:
+        return None
+        
+    totals = {'rows': 0, 'hits': 0, 'misses': 0}
+    for calendar, cache in caches:
+        for name, count in cache.stats().items():
+            totals[name] += count
+        store_row_cache(db, _calendar_state_key(calendar), cache, ROW_CACHE_FINGERPRINT)
+        
+    print(f"🧮 Row cache: {totals['hits']} hits, {totals['misses']} misses")
+    return totals
+
+# Bump when prepare_match_document() stores different fields: every calendar is then
+# fetched and synced in full once, so documents written before get the new fields
+MATCH_DOCUMENT_VERSION = 2
+
+def load_calendar_state(calendar):
+    """The stored validators of a calendar, empty when its documents are of an older version"""
+    state = load_state(db, _calendar_state_key(calendar))
+    if state and state.get('document_version') != MATCH_DOCUMENT_VERSION:
+        print(f"🔁 {calendar['name']} documents are of an older version - fetching in full")
+        return {}
+    return state
+
+def fetch_calendar(session, calendar, prefetched_content=None, previous_state=None):
+    """
+    Download a single protected calendar (network half of scrape_calendar)
     
-    # Login first
-    session = authenticate_orweja()
-    if not session:
-        print("❌ Authentication failed - cannot access protected calendars")
-        return []
+    When previous_state holds the validators of the last run, the request is
+    made conditional (ETag/Last-Modified).
     
-    all_matches = []
+    Returns (result, content): the result dict of scrape_calendar() and the
+    raw page body still to be parsed, or None when the calendar is already
+    done (HTTP 304 or error).
+    """
+    print(f"📅 Scraping {calendar['name']} calendar...")
     
-    # Calendar definitions with corrected field mappings
-    calendars = [
-        {
-            'name': 'Veldwedstrijd',
-            'url': 'https://my.orweja.nl/home/kalender/0',
-            'calendar_type': 'Veldwedstrijd'
-        },
-        {
-            'name': 'Jachthondenproef', 
-            'url': 'https://my.orweja.nl/home/kalender/1',
-            'calendar_type': 'Jachthondenproef'
-        },
-        {
-            'name': 'ORWEJA Werktest',
-            'url': 'https://my.orweja.nl/home/kalender/2', 
-            'calendar_type': 'ORWEJA Werktest'
-        }
-    ]
+    previous_state = previous_state or {}
+    result = {
+        'calendar': calendar,
+        'status': 'error',
+        'matches': [],
+        'state': {}
+    }
     
-    for calendar in calendars:
-        print(f"📅 Scraping {calendar['name']} calendar...")
+    try:
+        if prefetched_content is not None:
+            # Already downloaded while verifying the login
+            print(f"♻️ Reusing login check page for {calendar['name']}")
+            return result, prefetched_content
+            
+        headers = {}
+        if previous_state.get('etag'):
+            headers['If-None-Match'] = previous_state['etag']
+        if previous_state.get('last_modified'):
+            headers['If-Modified-Since'] = previous_state['last_modified']
+            
+        response = session.get(calendar['url'], headers=headers)
         
-        try:
-            response = session.get(calendar['url'])
-            response.raise_for_status()
+        if response.status_code == 304:
+            print(f"⏭️ {calendar['name']} not modified (HTTP 304) - skipping")
+            result['status'] = 'unchanged'
+            return result, None
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+        response.raise_for_status()
+        
+        result['state']['etag'] = response.headers.get('ETag')
+        result['state']['last_modified'] = response.headers.get('Last-Modified')
+        return result, response.content
+        
+    except Exception as e:
+        print(f"❌ Error scraping {calendar['name']}: {e}")
+        result['error'] = str(e)
+        return result, None
+
+def parse_fetched_calendar(content, calendar, previous_hash=None, row_cache=None):
+    """
+    Hash and parse a downloaded calendar (CPU half of scrape_calendar)
+    
+    Only takes and returns plain data, so it can run in a process pool.
+    Returns the content hash, the number of table rows and the parsed
+    matches, matches is None when the hash equals previous_hash. The row_cache is returned as well, a
+    process pool hands back a copy with this run's rows and counts.
+    """
+    # Hash the rows only: the rest of the page holds tokens that change every request.
+    # A first streaming pass hashes them, only a changed calendar is streamed again to be parsed
+    row_count = 0
+    digest = hashlib.sha256()
+    for cells in iter_calendar_rows(content):
+        row_count += 1
+        digest.update(repr(cells).encode('utf-8'))
+    content_hash = digest.hexdigest()
+    
+    if not row_count:
+        # No calendar table at all: never report such a page as unchanged
+        content_hash = hashlib.sha256(content if isinstance(content, bytes) else content.encode('utf-8')).hexdigest()
+        
+    if previous_hash == content_hash or not row_count:
+        return {'content_hash': content_hash, 'rows': row_count, 'matches': None, 'row_cache': row_cache}
+        
+    matches = list(iter_calendar_matches(iter_calendar_rows(content), calendar, row_cache))
+    return {'content_hash': content_hash, 'rows': row_count, 'matches': matches, 'row_cache': row_cache}
+
+def _apply_parsed_calendar(result, parsed):
+    """Merge the outcome of parse_fetched_calendar() into a fetch result"""
+    calendar = result['calendar']
+    result['state']['content_hash'] = parsed['content_hash']
+    result['state']['document_version'] = MATCH_DOCUMENT_VERSION
+    if parsed.get('row_cache') is not None:
+        result['row_cache'] = parsed['row_cache']
+
+    if not parsed['rows']:
+        # A login or maintenance page served with HTTP 200: syncing it would retire every match
+        print(f"❌ No calendar table in {calendar['name']} - keeping its matches")
+        result['status'] = 'error'
+        result['error'] = 'no calendar table'
+        return result
+        
+    if parsed['matches'] is None:
+        print(f"⏭️ {calendar['name']} content unchanged - skipping")
+        result['status'] = 'unchanged'
+        return result
+        
+    result['matches'] = parsed['matches']
+    result['status'] = 'changed'
+    print(f"✅ Found {len(result['matches'])} matches in {calendar['name']}")
+    return result
+
+def scrape_calendar(session, calendar, prefetched_content=None, previous_state=None, row_cache=None):
+    """
+    Fetch and parse a single protected calendar
+    
+    When previous_state holds the validators of the last run, the request is
+    made conditional (ETag/Last-Modified) and the table hash is compared, so an
+    unchanged calendar is neither parsed nor written again.
+    
+    Returns a result dict with the calendar, its status ('changed',
+    'unchanged' or 'error'), the parsed matches and the new validators.
+    """
+    result, content = fetch_calendar(session, calendar, prefetched_content, previous_state)
+    if content is None:
+        return result
+        
+    try:
+        parsed = parse_fetched_calendar(content, calendar, (previous_state or {}).get('content_hash'), row_cache)
+        return _apply_parsed_calendar(result, parsed)
+    except Exception as e:
+        print(f"❌ Error scraping {calendar['name']}: {e}")
+        result['error'] = str(e)
+        return result
+
+def run_calendar_pipeline(session, calendars, prefetched_pages, previous_states, max_concurrency, parse_workers=None, row_caches=None):
+    """
+    Fetch and parse calendars as a producer/consumer pipeline
+    
+    Fetch workers put every downloaded page body on a queue; the consumer
+    hands each body to the parse pool as soon as it arrives, so parsing one
+    calendar overlaps with downloading the next. The parse pool is a thread
+    pool, or a process pool with ORWEJA_PARSE_PROCESSES=true. row_caches
+    maps calendar URLs to their row parse cache.
+    
+    Returns the scrape_calendar() results in calendar order.
+    """
+    parse_workers = max(1, min(parse_workers or PARSE_WORKERS, len(calendars)))
+    row_caches = row_caches or {}
+    fetched_pages = queue.Queue()
+    results = [None] * len(calendars)
+    
+    def fetch(index, calendar):
+        try:
+            result, content = fetch_calendar(
+                session,
+                calendar,
+                prefetched_pages.get(calendar['url']),
+                previous_states.get(calendar['url'])
+            )
+        except Exception as e:
+            result, content = {'calendar': calendar, 'status': 'error', 'matches': [], 'state': {}, 'error': str(e)}, None
+        fetched_pages.put((index, result, content))
+        
+    parse_pool_class = ProcessPoolExecutor if PARSE_IN_PROCESSES else ThreadPoolExecutor
+    
+    with ThreadPoolExecutor(max_workers=max_concurrency) as fetch_pool, \
+            parse_pool_class(max_workers=parse_workers) as parse_pool:
+        for index, calendar in enumerate(calendars):
+            fetch_pool.submit(fetch, index, calendar)
             
-            # Find the calendar table
-            calendar_table = soup.find('table', {'class': 'table'})
-            if not calendar_table:
-                print(f"⚠️ No calendar table found for {calendar['name']}")
+        parsing = {}
+        for _ in calendars:
+            index, result, content = fetched_pages.get()
+            results[index] = result
+            if content is None:
                 continue
+                
+            calendar = result['calendar']
+            previous_hash = (previous_states.get(calendar['url']) or {}).get('content_hash')
+            parsing[index] = parse_pool.submit(
+                parse_fetched_calendar, content, calendar, previous_hash, row_caches.get(calendar['url'])
+            )
             
-            # Find all match rows (skip header)
-            match_rows = calendar_table.find_all('tr')[1:]  # Skip header row
+        for index, future in parsing.items():
+            try:
+                _apply_parsed_calendar(results[index], future.result())
+            except Exception as e:
+                print(f"❌ Error parsing {results[index]['calendar']['name']}: {e}")
+                results[index]['error'] = str(e)
+                
+    return results
+
+def match_key(match):
+    """Deduplication key of a match, the same match in two calendars shares it"""
+    return f"{match['date']}_{match['organizer']}_{match['location']}"
+
+def iter_unique_matches(matches, seen_keys=None):
+    """Yield the matches not seen before, based on date + organizer + location"""
+    if seen_keys is None:
+        seen_keys = set()
+        
+    for match in matches:
+        key = match_key(match)
+        if key not in seen_keys:
+            seen_keys.add(key)
+            yield match
+
+def load_stored_match_keys(calendar_types):
+    """
+    Deduplication keys of the stored matches of calendar_types
+    
+    Calendars that are not synced in a run (unchanged or failed) keep their
+    documents, so the calendars that are synced must not insert those
+    matches a second time: calendar_type is part of the document ID.
+    """
+    if not db or not calendar_types:
+        return set()
+        
+    try:
+        keys = set()
+        for doc in db.collection(MATCHES_COLLECTION).where('calendar_type', 'in', list(calendar_types)).stream():
+            data = current_version(doc.to_dict() or {})
+            if data.get('retired_generation') is None:
+                keys.add(match_key(data))
+        return keys
+    except Exception as e:
+        print(f"⚠️ Error loading stored match keys: {e}")
+        return set()
+
+def deduplicate_matches(matches):
+    """Remove duplicates based on date + organizer + location"""
+    return list(iter_unique_matches(matches))
+
+def run_tier2_scrape(max_concurrency=None, conditional=True, calendars=None, enrich=False):
+    """
+    Scrape the three protected calendars with authentication
+    
+    The calendars are fetched concurrently on the same authenticated
+    session (shared cookie jar) and parsed by a separate worker pool while
+    the other downloads are still in flight (run_calendar_pipeline).
+    
+    With conditional=True, calendars that did not change since the last
+    stored run are skipped. calendars limits the run to a subset of
+    TIER2_CALENDARS (targeted runs). With enrich=True the registration
+    pages of the scraped matches are followed for extra details. Rows
+    seen in earlier runs come from the row parse cache (row_cache.py),
+    its hit/miss counts are returned under 'row_cache'. Returns a dict with the deduplicated matches of
+    the changed calendars and the per-calendar results; the new validators
+    are only stored by save_calendar_states() once the matches are written.
+    """
+    print("🔐 Starting Tier 2 scraping (protected calendars)...")
+    
+    scrape_result = {
+        'authenticated': False,
+        'matches': [],
+        'calendar_results': [],
+        'enrichment': None,
+        'row_cache': None,
+        'transport': {}
+    }
+    
+    # Login first (or reuse the cached session)
+    session, check_page = open_orweja_session()
+    if not session:
+        print("❌ Authentication failed - cannot access protected calendars")
+        return scrape_result
+        
+    scrape_result['authenticated'] = True
+    
+    if calendars is None:
+        calendars = TIER2_CALENDARS
+        
+    if max_concurrency is None:
+        max_concurrency = MAX_CALENDAR_CONCURRENCY
+    max_concurrency = max(1, min(max_concurrency, len(calendars)))
+    
+    previous_states = {}
+    if conditional:
+        for calendar in calendars:
+            previous_states[calendar['url']] = load_calendar_state(calendar)
             
-            for row in match_rows:
-                try:
-                    cells = row.find_all('td')
-                    if len(cells) < 4:
-                        continue
-                    
-                    # CORRECTED FIELD MAPPING based on actual ORWEJA structure
-                    # Column 0: Date
-                    date_text = cells[0].get_text(strip=True)
-                    if not date_text or not re.match(r'\d{1,2}-\d{1,2}-\d{4}', date_text):
-                        continue
-                    
-                    match_date = parse_date(date_text)
-                    if not match_date:
-                        continue
-                    
-                    # Column 1: Match type/details (CAC, CACIT, etc.)
-                    match_type = cells[1].get_text(strip=True)
-                    if not match_type:
-                        continue
-                    
-                    # Column 2: Organizer 
-                    organizer = cells[2].get_text(strip=True)
-                    # Clean organizer text
-                    organizer = re.sub(r'\[email[^\]]*protected\]', '', organizer)
-                    organizer = re.sub(r'\[email[^\]]*\]', '', organizer)
-                    organizer = re.sub(r'\s+', ' ', organizer).strip()
-                    
-                    # Column 3: Location
-                    location = cells[3].get_text(strip=True)
-                    # Clean location text
-                    location = re.sub(r'\[email[^\]]*protected\]', '', location)
-                    location = re.sub(r'\[email[^\]]*\]', '', location)
-                    location = re.sub(r'Aanvang:\s*\d{1,2}[:.]\d{2}', '', location)
-                    location = re.sub(r'\s+', ' ', location).strip()
-                    
-                    # Column 5: Registration status and URL (6th column - "Inschrijven")
-                    registration_text = ""
-                    registration_url = ""
-                    if len(cells) > 5:
-                        reg_cell = cells[5]
-                        registration_text = reg_cell.get_text(strip=True)
-                        
-                        # Look for enrollment link in this cell
-                        link = reg_cell.find('a')
-                        if link and link.get('href'):
-                            href = link.get('href')
-                            # Convert relative URLs to absolute URLs
-                            if href.startswith('/'):
-                                registration_url = f"https://my.orweja.nl{href}"
-                            elif href.startswith('http'):
-                                registration_url = href
-                            else:
-                                registration_url = f"https://my.orweja.nl/{href}"
-                    
-                    # Column 4: Remarks/Notes ("Opmerking")
-                    remarks_from_column = ""
-                    if len(cells) > 4:
-                        remarks_from_column = cells[4].get_text(strip=True)
-                        # Clean remarks text
-                        remarks_from_column = re.sub(r'\[email[^\]]*protected\]', '', remarks_from_column)
-                        remarks_from_column = re.sub(r'\[email[^\]]*\]', '', remarks_from_column)
-                        remarks_from_column = re.sub(r'\s+', ' ', remarks_from_column).strip()
-                    
-                    # Combine remarks from column 4 with any additional columns
-                    general_remarks = ""
-                    if remarks_from_column and remarks_from_column not in ['', ' ', '-']:
-                        general_remarks = remarks_from_column
-                    
-                    # Column 6+: Check for any additional remarks/notes in remaining columns
-                    if len(cells) > 6:
-                        for i in range(6, len(cells)):
-                            cell_text = cells[i].get_text(strip=True)
-                            # Clean cell text
-                            cell_text = re.sub(r'\[email[^\]]*protected\]', '', cell_text)
-                            cell_text = re.sub(r'\[email[^\]]*\]', '', cell_text)
-                            cell_text = re.sub(r'\s+', ' ', cell_text).strip()
-                            
-                            # Skip if this is actually registration status (not a real remark)
-                            if cell_text.lower() in ['inschrijven', 'niet mogelijk', 'niet meer mogelijk']:
-                                continue
-                            if cell_text.lower().startswith('vanaf '):
-                                continue
-                            
-                            if cell_text and cell_text not in ['', ' ', '-']:
-                                if general_remarks:
-                                    general_remarks += f" | {cell_text}"
-                                else:
-                                    general_remarks = cell_text
-                    
-                    # NORMALIZE MATCH TYPES: Convert to standardized types and acronyms
-                    normalized_type = match_type
-                    match_details = None
-                    
-                    if calendar['calendar_type'] == 'Veldwedstrijd':
-                        # For Veldwedstrijd calendar, normalize CAC/CACIT to "Veldwedstrijd"
-                        if match_type.upper().startswith('CACIT') or 'CACIT' in match_type.upper():
-                            normalized_type = 'Veldwedstrijd'  
-                            match_details = f"Internationale kwalificatie: {match_type}"
-                        elif match_type.upper().startswith('CAC') or 'CAC' in match_type.upper():
-                            normalized_type = 'Veldwedstrijd'
-                            match_details = f"Kwalificatie: {match_type}"
-                        else:
-                            normalized_type = 'Veldwedstrijd'
-                    elif calendar['calendar_type'] == 'Jachthondenproef':
-                        # Convert long names to acronyms for Jachthondenproef calendar
-                        if 'standaard jachthonden' in match_type.lower() or 'standaard jachthondenproef' in match_type.lower():
-                            normalized_type = 'SJP'
-                        elif 'middelgrote apporteur' in match_type.lower() or 'map' in match_type.lower():
-                            normalized_type = 'MAP'
-                        elif 'praktijk jacht' in match_type.lower() or 'pjp' in match_type.lower() or 'provinciale jachthonden' in match_type.lower():
-                            normalized_type = 'PJP'
-                        elif 'terrier apporteur' in match_type.lower() or 'team apporteer' in match_type.lower() or 'tap' in match_type.lower():
-                            normalized_type = 'TAP'
-                        elif 'kleine apporteur' in match_type.lower() or 'kap' in match_type.lower():
-                            normalized_type = 'KAP'
-                        elif 'stöberhunde' in match_type.lower() or 'swt' in match_type.lower() or 'spaniël workingtest' in match_type.lower():
-                            normalized_type = 'SWT'
-                        elif 'orweja werktest' in match_type.lower() or 'owt' in match_type.lower():
-                            normalized_type = 'OWT'
-                        # If no specific match, keep original but clean it
-                        else:
-                            normalized_type = match_type
-                    
-                    # Create match record
-                    match_data = {
-                        'date': match_date,
-                        'organizer': organizer,
-                        'location': location,
-                        'type': normalized_type,
-                        'registration_text': registration_text.lower() if registration_text else 'inschrijven',
-                        'calendar_type': calendar['calendar_type'],
-                        'source': 'tier2'
-                    }
-                    
-                    # Add registration URL if we found one
-                    if registration_url:
-                        match_data['registration_url'] = registration_url
-                    
-                    # Combine general remarks with qualification details
-                    combined_remarks = ""
-                    if general_remarks:
-                        combined_remarks = general_remarks
-                    if match_details:
-                        if combined_remarks:
-                            combined_remarks += f" | {match_details}"
-                        else:
-                            combined_remarks = match_details
-                    
-                    # Add combined remarks if we have any
-                    if combined_remarks:
-                        match_data['remark'] = combined_remarks
-                    
-                    all_matches.append(match_data)
-                    
-                except Exception as e:
-                    print(f"⚠️ Error parsing row in {calendar['name']}: {e}")
-                    continue
+    print(f"⚡ Fetching {len(calendars)} calendars (concurrency: {max_concurrency}, "
+          f"parse workers: {PARSE_WORKERS}{' processes' if PARSE_IN_PROCESSES else ''})")
+    started = time.time()
+    
+    prefetched_pages = {ORWEJA_CHECK_URL: check_page}
+    
+    row_caches = load_row_caches(calendars)
+    calendar_results = run_calendar_pipeline(
+        session, calendars, prefetched_pages, previous_states, max_concurrency, row_caches=row_caches
+    )
+    scrape_result['row_cache'] = save_row_caches(calendar_results)
+
+    all_matches = []
+    for calendar_result in calendar_results:
+        all_matches.extend(calendar_result['matches'])
+        
+    print(f"⏱️ Calendar fetching took {time.time() - started:.2f}s")
+    print(f"📊 Tier 2 total: {len(all_matches)} matches")
+    
+    # Matches stored under a calendar that is not synced this run stay there
+    seen_keys = set()
+    if any(r['status'] == 'changed' for r in calendar_results):
+        seen_keys = load_stored_match_keys([r['calendar']['calendar_type'] for r in calendar_results if r['status'] != 'changed'])
+        
+    scrape_result['matches'] = list(iter_unique_matches(all_matches, seen_keys))
+    scrape_result['calendar_results'] = calendar_results
+    
+    print(f"📊 After deduplication: {len(scrape_result['matches'])} unique matches")
+    
+    # Optional: follow registration_url for capacity, closing time, fee
+    if enrich and scrape_result['matches']:
+        scrape_result['enrichment'] = enrich_matches(session, scrape_result['matches'], db)
+        
+    scrape_result['transport'] = session.stats()
+    return scrape_result
+
+def save_calendar_states(calendar_results):
+    """Store the validators of the calendars that were written this run"""
+    for calendar_result in calendar_results:
+        if calendar_result['status'] == 'changed':
+            save_state(db, _calendar_state_key(calendar_result['calendar']), calendar_result['state'])
+
+def scrape_tier2_protected_calendars(max_concurrency=None):
+    """Scrape all three protected calendars in full, returns the unique matches"""
+    return run_tier2_scrape(max_concurrency=max_concurrency, conditional=False)['matches']
+
+def stream_calendar_matches(session, calendar, prefetched_content=None, state=None):
+    """
+    Yield the matches of one calendar while its page is still downloading
+    
+    The response body is fed to the row parser chunk by chunk, so neither
+    the page DOM nor a match list is ever held for the whole calendar.
+    The rows are hashed on the way, a given state dict receives the
+    validators scrape_calendar() would store. Raises once the page turns
+    out to hold no calendar table.
+    """
+    print(f"📅 Streaming {calendar['name']} calendar...")
+    
+    row_count = 0
+    digest = hashlib.sha256()
+    
+    def hashed(rows):
+        nonlocal row_count
+        for cells in rows:
+            row_count += 1
+            digest.update(repr(cells).encode('utf-8'))
+            yield cells
             
-            print(f"✅ Found {len([m for m in all_matches if m['calendar_type'] == calendar['calendar_type']])} matches in {calendar['name']}")
+    if prefetched_content is not None:
+        yield from iter_calendar_matches(hashed(iter_calendar_rows(prefetched_content)), calendar)
+    else:
+        with session.get(calendar['url'], stream=True) as response:
+            response.raise_for_status()
+            if state is not None:
+                state['etag'] = response.headers.get('ETag')
+                state['last_modified'] = response.headers.get('Last-Modified')
+            yield from iter_calendar_matches(hashed(iter_calendar_rows(response.iter_content(STREAM_CHUNK_SIZE))), calendar)
             
-        except Exception as e:
-            print(f"❌ Error scraping {calendar['name']}: {e}")
-            continue
+    if not row_count:
+        # A login or maintenance page served with HTTP 200, its documents must stay
+        raise ValueError('no calendar table')
+    if state is not None:
+        state['content_hash'] = digest.hexdigest()
+        state['document_version'] = MATCH_DOCUMENT_VERSION
+
+def stream_tier2_scrape(calendars=None):
+    """
+    Full refresh that streams rows straight into Firestore
     
-    print(f"📊 Tier 2 total: {len(all_matches)} matches")
+    Matches flow from the row parser through deduplication into
+    upload_to_firebase() one at a time, so the first documents are written
+    before the first calendar page has been parsed completely, and no
+    match list is built. A calendar that fails halfway keeps the matches
+    written so far, and none of its documents are deleted.
     
-    # Remove duplicates based on date + organizer + location
-    unique_matches = []
+    Returns a run_tier2_scrape() result without matches: the per-calendar
+    results (streamed calendars count as changed), the number of unique
+    matches by calendar type under 'match_counts' and the sync stats under
+    'sync' (None when the sync failed).
+    """
+    scrape_result = {
+        'authenticated': False,
+        'matches': [],
+        'match_counts': {},
+        'calendar_results': [],
+        'sync': None,
+        'enrichment': None,
+        'row_cache': None,
+        'transport': {}
+    }
+    
+    session, check_page = open_orweja_session()
+    if not session:
+        print("❌ Authentication failed - cannot access protected calendars")
+        return scrape_result
+        
+    scrape_result['authenticated'] = True
+    
+    calendar_types = None
+    if calendars is None:
+        calendars = TIER2_CALENDARS
+    else:
+        calendar_types = [calendar['calendar_type'] for calendar in calendars]
+        
+    calendar_results = [
+        {'calendar': calendar, 'status': 'changed', 'matches': [], 'state': {}}
+        for calendar in calendars
+    ]
+    match_counts = scrape_result['match_counts']
+    
+    # Filled while streaming, upload_to_firebase() reads it once the deletes come up
+    failed_calendar_types = set()
     seen_keys = set()
     
-    for match in all_matches:
-        key = f"{match['date']}_{match['organizer']}_{match['location']}"
-        if key not in seen_keys:
-            unique_matches.append(match)
-            seen_keys.add(key)
+    def calendar_matches():
+        for calendar_result in calendar_results:
+            calendar = calendar_result['calendar']
+            prefetched = check_page if calendar['url'] == ORWEJA_CHECK_URL else None
+            try:
+                yield from stream_calendar_matches(session, calendar, prefetched, calendar_result['state'])
+            except Exception as e:
+                print(f"❌ Error streaming {calendar['name']}: {e}")
+                calendar_result['status'] = 'error'
+                calendar_result['error'] = str(e)
+                failed_calendar_types.add(calendar['calendar_type'])
+                # Its stored matches stay, the calendars after it must not insert them again
+                seen_keys.update(load_stored_match_keys([calendar['calendar_type']]))
+                
+    def counted(matches):
+        for match in matches:
+            match_counts[match['calendar_type']] = match_counts.get(match['calendar_type'], 0) + 1
+            yield match
+            
+    stats = upload_to_firebase(counted(iter_unique_matches(calendar_matches(), seen_keys)), calendar_types, failed_calendar_types)
+    if stats is not None:
+        stats['failed_calendars'] = [r['calendar']['name'] for r in calendar_results if r['status'] == 'error']
+        
+    scrape_result['calendar_results'] = calendar_results
+    scrape_result['sync'] = stats
+    scrape_result['transport'] = session.stats()
+    return scrape_result
+
+def stream_tier2_to_firebase(calendars=None):
+    """
+    Full refresh that streams rows straight into Firestore (stream_tier2_scrape())
     
-    print(f"📊 After deduplication: {len(unique_matches)} unique matches")
-    return unique_matches
+    Returns the sync stats (the calendars that failed under
+    'failed_calendars'), None when authentication or the sync failed.
+    """
+    return stream_tier2_scrape(calendars)['sync']
 
 # ====================================================================
 # ARCHIVED: Tier 1/Tier 2 Matching Logic (No longer used - July 2025)
@@ -483,20 +1131,21 @@ def match_tier1_tier2_ARCHIVED(tier1_matches, tier2_matches):
     matched_matches = []
     unmatched_tier1 = []
     
+    # Only entries on the same date can match: compare within date blocks
+    tier2_by_date = build_date_index(tier2_matches)
+    
     for tier1_match in tier1_matches:
         best_match = None
         best_similarity = 0
         
-        for tier2_match in tier2_matches:
-            # Check date similarity
-            if tier1_match['date'] == tier2_match['date']:
-                # Check organizer similarity
-                org_similarity = similarity(tier1_match['organizer'], tier2_match['organizer'])
-                
-                if org_similarity > 0.5 and org_similarity > best_similarity:  # Lowered to 50% threshold
-                    best_match = tier2_match
-                    best_similarity = org_similarity
-                    print(f"🔍 Potential match: {tier1_match['organizer'][:30]}... vs {tier2_match['organizer'][:30]}... (similarity: {org_similarity:.2f})")
+        for tier2_organizer, tier2_match in tier2_by_date.get(tier1_match['date'], []):
+            # Check organizer similarity
+            org_similarity = similarity(tier1_match['organizer'], tier2_organizer)
+            
+            if org_similarity > 0.5 and org_similarity > best_similarity:  # Lowered to 50% threshold
+                best_match = tier2_match
+                best_similarity = org_similarity
+                print(f"🔍 Potential match: {tier1_match['organizer'][:30]}... vs {tier2_organizer[:30]}... (similarity: {org_similarity:.2f})")
         
         if best_match:
             # Use Tier 2 data but keep Tier 1 registration status if Tier 2 doesn't have it
@@ -526,84 +1175,182 @@ def match_tier1_tier2_ARCHIVED(tier1_matches, tier2_matches):
     
     return final_matches
 
-def upload_to_firebase(matches):
-    """Upload matches to Firebase Firestore"""
+def prepare_match_document(match):
+    """Convert a scraped match into the Firestore document data"""
+    match_data = match.copy()
+    
+    # The date as native Timestamp for range queries, the app keeps reading the string
+    match_date = match['date'] if hasattr(match['date'], 'year') else parse_calendar_date(str(match['date']))
+    match_data['date_at'] = day_start(match_date) if match_date else None
+    
+    # Convert date to string for Firestore
+    if hasattr(match_data['date'], 'isoformat'):
+        match_data['date'] = match_data['date'].isoformat()
+    elif isinstance(match_data['date'], str):
+        # Already a string, keep as is
+        pass
+    else:
+        # Convert to string if it's a date object
+        match_data['date'] = str(match_data['date'])
+        
+    # Add timestamp
+    match_data['created_at'] = datetime.now()
+    
+    return match_data
+
+def upload_to_firebase(matches, calendar_types=None, keep_calendar_types=()):
+    """
+    Sync matches into Firebase Firestore
+    
+    The stored documents are loaded once and diffed against the matches
+    (match_sync.py), so only inserts, updates and deletes are written.
+    Documents are stored under the content-addressed ID of their match.
+    The run becomes visible to the app at once, as a new generation, when
+    all its writes have landed; removed matches are deleted by the next run.
+    The changes whose writes landed are appended to the match_changes feed
+    (change_feed.py), also when other writes of the run failed.
+    When calendar_types is given only the documents of those calendars are
+    synced, so calendars that were skipped this run keep their documents.
+    matches may be any iterable (e.g. a generator), inserts and updates are
+    written (in batches) as it yields them. Documents of keep_calendar_types
+    are never deleted; it is only read once matches is exhausted, so a
+    generator can still add the calendars it failed to scrape. Returns the
+    sync stats (inserted/updated/deleted/unchanged, plus the writer stats
+    under 'writes' and the last change feed sequence under 'changes'),
+    None when nothing could be synced.
+    """
     if not db:
         print("❌ Firebase not initialized")
-        return
+        return None
     
-    print("💾 Uploading matches to Firestore...")
+    print("💾 Syncing matches to Firestore...")
     
-    # Clear existing matches
+    # Nobody reads the documents retired by earlier runs anymore
+    collect_retired_matches(db)
+    
+    # Load the published generation and the current documents once
     try:
-        existing_matches = db.collection('matches').stream()
-        for match in existing_matches:
-            match.reference.delete()
-        print("🗑️ Cleared existing matches")
+        published, pending = load_generation_pointer(db)
+        generation = published + 1
+        if calendar_types is None:
+            existing_matches = list(db.collection(MATCHES_COLLECTION).stream())
+        else:
+            existing_matches = list(db.collection(MATCHES_COLLECTION).where('calendar_type', 'in', list(calendar_types)).stream())
     except Exception as e:
-        print(f"⚠️ Error clearing existing matches: {e}")
+        # Without the current state every match would be inserted a second time
+        print(f"❌ Error loading existing matches: {e}")
+        return None
     
-    # Upload new matches
-    for match in matches:
-        try:
-            # Convert date to string for Firestore
-            match_data = match.copy()
-            if hasattr(match_data['date'], 'isoformat'):
-                match_data['date'] = match_data['date'].isoformat()
-            elif isinstance(match_data['date'], str):
-                # Already a string, keep as is
-                pass
-            else:
-                # Convert to string if it's a date object
-                match_data['date'] = str(match_data['date'])
-            
-            # Add timestamp
-            match_data['created_at'] = datetime.now()
+    stats = new_sync_stats()
+    documents = (prepare_match_document(match) for match in matches)
+    matches_collection = db.collection(MATCHES_COLLECTION)
+    
+    # Writes go out in 500-operation batches while the diff is still running
+    held = pending is not None
+    writer = BatchedWriter(db)
+    try:
+        for operation, doc_id, data, previous in diff_matches(existing_matches, documents, generation):
+            if operation == 'deleted' and previous.get('calendar_type') in keep_calendar_types:
+                # Missing because its calendar failed, not because the match was removed
+                operation = 'unchanged'
+                
+            if operation != 'unchanged' and not held:
+                hold_generation(db, generation)
+                held = True
+                
+            # The change record rides along with its write, it is only recorded when the write lands
+            record = change_record(operation, doc_id, data, previous)
+            if operation == 'inserted':
+                writer.set(matches_collection.document(doc_id), data, tag=record)
+                print(f"➕ Added new match: {data['organizer']} - {data['date']}")
+            elif operation == 'updated':
+                # Staged, readers keep the current version until this generation is published
+                writer.update(matches_collection.document(doc_id), staged_update(data, generation, previous), tag=record)
+                print(f"✏️ Updated match: {data['organizer']} - {data['date']}")
+            elif operation == 'deleted':
+                # Hidden once this generation is published, deleted by the next run
+                writer.update(matches_collection.document(doc_id), {'retired_generation': generation}, tag=record)
+            stats[operation] += 1
+    except Exception as e:
+        print(f"❌ Sync aborted: {e}")
+        stats['aborted'] = True
+    finally:
+        stats['writes'] = writer.close()
             
-            # Add to Firestore
-            db.collection('matches').add(match_data)
-            print(f"➕ Added new match: {match['organizer']} - {match['date']}")
+    # Flip the pointer only when the whole run has landed, else the next run publishes it
+    if held:
+        if stats['writes']['errors'] or stats.get('aborted'):
+            print(f"⚠️ Sync incomplete - generation {generation} not published")
+        else:
+            try:
+                publish_generation(db, generation)
+                stats['generation'] = generation
+            except Exception as e:
+                print(f"❌ Error publishing generation {generation}: {e}")
+            else:
+                # Queries on top-level fields (openings, past matches) now see the published updates
+                fold_staged_matches(db, generation)
+                
+    # Landed writes show up as unchanged in the next run, so their changes are recorded now
+    if writer.committed:
+        stats['changes'] = emit_changes(db, writer.committed, generation if held else None)
             
-        except Exception as e:
-            print(f"❌ Error uploading match {match.get('organizer', 'Unknown')}: {e}")
-    
-    print(f"💾 Uploaded {len(matches)} matches to Firestore")
+    scope = 'all calendars' if calendar_types is None else ', '.join(calendar_types)
+    print(f"💾 Synced matches to Firestore ({scope}): {stats['inserted']} inserted, {stats['updated']} updated, "
+          f"{stats['deleted']} deleted, {stats['unchanged']} unchanged")
+    return stats
+
+# Registration text of matches whose date has passed
+CLOSED_REGISTRATION_TEXT = 'niet meer mogelijk'
 
 def mark_past_matches_as_closed():
-    """Mark matches with past dates as closed"""
+    """
+    Mark matches with past dates as closed
+    
+    Only past matches that are not closed yet are read (date_at +
+    registration_text composite index, firestore.indexes.json), so a run
+    costs the matches that expired since the last run instead of a scan of
+    the whole collection. Every closure is recorded in the change feed as a
+    status change. Returns the number of matches marked.
+    """
     if not db:
-        return
+        return 0
     
+    marked = 0
+    writer = BatchedWriter(db)
     try:
-        today = datetime.now().date()
+        today = day_start(datetime.now(ORWEJA_TIMEZONE).date())
         
-        # Get all matches
-        matches_ref = db.collection('matches').stream()
+        expired_matches = (db.collection(MATCHES_COLLECTION)
+                           .where('date_at', '<', today)
+                           .where('registration_text', '!=', CLOSED_REGISTRATION_TEXT)
+                           .stream())
         
-        for match_doc in matches_ref:
+        for match_doc in expired_matches:
             match_data = match_doc.to_dict()
             
-            # Check if match date is in the past
-            if 'date' in match_data:
-                try:
-                    if isinstance(match_data['date'], str):
-                        match_date = datetime.strptime(match_data['date'], '%Y-%m-%d').date()
-                    else:
-                        match_date = match_data['date']
-                    
-                    if match_date < today:
-                        # Update registration status to closed
-                        match_doc.reference.update({
-                            'registration_text': 'niet meer mogelijk',
-                            'updated_at': datetime.now()
-                        })
-                        print(f"🔒 Marked past match as closed: {match_data.get('organizer', 'Unknown')}")
-                        
-                except Exception as e:
-                    print(f"⚠️ Error processing match date: {e}")
+            # Update registration status to closed, also in a staged version
+            closed = {
+                'registration_text': CLOSED_REGISTRATION_TEXT,
+                'updated_at': datetime.now()
+            }
+            if isinstance(match_data.get('staged'), dict):
+                closed['staged.registration_text'] = CLOSED_REGISTRATION_TEXT
+            writer.update(match_doc.reference, closed, tag=change_record(
+                'updated', match_doc.id, dict(match_data, registration_text=CLOSED_REGISTRATION_TEXT), match_data
+            ))
+            marked += 1
+            print(f"🔒 Marked past match as closed: {match_data.get('organizer', 'Unknown')}")
                     
     except Exception as e:
         print(f"❌ Error marking matches as closed: {e}")
+    finally:
+        writer.close()
+        
+    if writer.committed:
+        emit_changes(db, writer.committed)
+        
+    return marked
 
 def export_matches_to_csv(tier1_matches, tier2_matches):
     """Export matches to CSV format (Tier 2 only since July 2025)"""
@@ -637,6 +1384,8 @@ def convert_dates_to_strings(matches):
             converted_match['date'] = converted_match['date'].isoformat()
         elif 'date' in converted_match and hasattr(converted_match['date'], 'strftime'):
             converted_match['date'] = converted_match['date'].strftime('%Y-%m-%d')
+        if hasattr(converted_match.get('registration_opens_at'), 'isoformat'):
+            converted_match['registration_opens_at'] = converted_match['registration_opens_at'].isoformat()
         converted_matches.append(converted_match)
     return converted_matches
 
@@ -676,26 +1425,134 @@ def main(request):
     # Check if CSV export is requested
     request_json = request.get_json(silent=True) or {}
     export_csv = request_json.get('export_all_data', False)
-    
+    max_concurrency = request_json.get('max_concurrency')
+    # Unchanged calendars are skipped, except when all data is needed
+    force_full_scrape = request_json.get('force_full_scrape', False) or export_csv
+    # Frequent probe runs only log in when the public calendar changed
+    probe_first = request_json.get('probe', os.environ.get('ORWEJA_PROBE_FIRST') == '1')
+    # 'tick' runs come from the frequent scheduler job and only scrape planned slots
+    mode = request_json.get('mode', 'full')
+    # Optional enrichment from the registration detail pages
+    enrich_details = request_json.get('enrich_details', os.environ.get('ORWEJA_ENRICH_DETAILS') == '1')
+    # 'sync' (default) or 'async' scrape engine, same JSON summary either way
+    engine = request_json.get('engine', os.environ.get('SCRAPER_ENGINE', 'sync'))
+
     # Initialize Firebase
     firebase_available = initialize_firebase()
     
+    # Step 0a: Targeted runs scrape only the calendars with an opening due now
+    target_calendars = None
+    if mode == 'tick':
+        due_calendar_types = take_due_slots(db) if firebase_available else []
+        if not due_calendar_types:
+            print("💤 No targeted scrape due")
+            return json.dumps({
+                'success': True,
+                'mode': mode,
+                'scrape_skipped': True,
+                'timestamp': datetime.now().isoformat()
+            }), 200
+        target_calendars = [c for c in TIER2_CALENDARS if c['calendar_type'] in due_calendar_types]
+        
+    # Step 0b: Cheap change detection on the public widget
+    probe = None
+    if probe_first and not force_full_scrape and mode != 'tick':
+        probe = probe_public_calendar()
+        if not probe['changed']:
+            print("💤 Public calendar unchanged - skipping the authenticated scrape")
+            return json.dumps({
+                'success': True,
+                'scrape_skipped': True,
+                'probe': probe,
+                'scraper_version': 'tier2_only',
+                'timestamp': datetime.now().isoformat()
+            }), 200
+    
     # Step 1: Scrape Tier 2 (protected calendars) - Our only data source
-    tier2_matches = scrape_tier2_protected_calendars()
+    if engine == 'async':
+        try:
+            from async_engine import run_tier2_pipeline_async
+        except ImportError as e:
+            print(f"⚠️ Async engine unavailable ({e}) - falling back to sync engine")
+            engine = 'sync'
+            
+    # A full refresh on the sync engine streams rows straight into Firestore, no match list is built
+    stream_refresh = (engine != 'async' and force_full_scrape and firebase_available
+                      and not export_csv and not enrich_details)
+            
+    if engine == 'async':
+        # The async pipeline writes each calendar to Firestore as soon as it is parsed
+        scrape_result = asyncio.run(run_tier2_pipeline_async(
+            max_concurrency=max_concurrency,
+            conditional=not force_full_scrape,
+            calendars=target_calendars,
+            enrich=enrich_details,
+            write=firebase_available and not export_csv
+        ))
+    elif stream_refresh:
+        scrape_result = stream_tier2_scrape(target_calendars)
+    else:
+        scrape_result = run_tier2_scrape(
+            max_concurrency=max_concurrency,
+            conditional=not force_full_scrape,
+            calendars=target_calendars,
+            enrich=enrich_details
+        )
+    tier2_matches = scrape_result['matches']
+    calendar_results = scrape_result['calendar_results']
+    # A streamed refresh only counts its matches
+    match_counts = scrape_result.get('match_counts') or {}
+    for match in tier2_matches:
+        match_counts[match.get('calendar_type')] = match_counts.get(match.get('calendar_type'), 0) + 1
+    tier2_total = sum(match_counts.values())
     
-    if not tier2_matches:
+    changed_calendars = [r['calendar'] for r in calendar_results if r['status'] == 'changed']
+    skipped_calendars = [r['calendar']['name'] for r in calendar_results if r['status'] == 'unchanged']
+    failed_calendars = [r['calendar']['name'] for r in calendar_results if r['status'] == 'error']
+    
+    # Skipped and failed calendars keep their matches (which may hold every match of this run)
+    if not tier2_total and not skipped_calendars and not failed_calendars:
         print("❌ No matches found in Tier 2")
         return json.dumps({"error": "No matches found in Tier 2"}), 200
     
+    if skipped_calendars:
+        print(f"⏭️ Unchanged calendars skipped: {', '.join(skipped_calendars)}")
+    
     # Use Tier 2 matches as our final data source
     print("✅ Using Tier 2 only - cleaner and more accurate data source")
     final_matches = tier2_matches
     
-    # Step 2: Upload to Firebase (if available and not just exporting)
-    if firebase_available and final_matches and not export_csv:
-        upload_to_firebase(final_matches)
-        mark_past_matches_as_closed()
+    # The async engine and a streamed refresh have synced their calendars while scraping
+    sync_stats = scrape_result.get('sync')
+    sync_failed = False
     
+    # Step 2: Upload to Firebase (if available and not just exporting)
+    if firebase_available and not export_csv:
+        if final_matches and engine != 'async' and not stream_refresh:
+            # A full set of calendars syncs everything (removing legacy docs)
+            if len(changed_calendars) == len(TIER2_CALENDARS):
+                sync_stats = upload_to_firebase(final_matches)
+            else:
+                sync_stats = upload_to_firebase(final_matches, calendar_types=[c['calendar_type'] for c in changed_calendars])
+        if stream_refresh or (final_matches and engine != 'async'):
+            # Validators of a failed sync would skip its calendars next run, so their writes are never retried
+            if sync_succeeded(sync_stats):
+                save_calendar_states(calendar_results)
+            else:
+                sync_failed = True
+                print("⚠️ Sync failed - calendar validators not stored, the next run scrapes them again")
+        elif changed_calendars and engine == 'async' and sync_stats is None:
+            # The async engine could not write this run (no generation pointer)
+            sync_failed = True
+        # Only a complete, fully written run may mark the probed state as seen
+        if probe and not failed_calendars and not sync_failed:
+            save_probe_fingerprint(probe)
+        # Targeted runs stay cheap, the baseline run does the full cleanup
+        if mode != 'tick':
+            mark_past_matches_as_closed()
+        # Plan the next targeted scrapes from the updated registration openings
+        replan_schedule(db)
+
     # Step 3: Export to CSV if requested
     csv_content = None
     if export_csv:
@@ -704,21 +1561,36 @@ def main(request):
     
     print("=" * 50)
     print("🎉 Scraper completed successfully!")
-    print(f"📊 Tier 2 matches: {len(tier2_matches)}")
-    print(f"📊 Final matches: {len(final_matches)}")
+    print(f"📊 Tier 2 matches: {tier2_total}")
+    print(f"📊 Final matches: {tier2_total}")
     print("=" * 50)
     
     # Return success response
     result = {
         'success': True,
-        'tier2_matches': len(tier2_matches),
+        'mode': mode,
+        'engine': engine,
+        'tier2_matches': tier2_total,
         'tier2_breakdown': {
-            'veldwedstrijd': len([m for m in tier2_matches if m.get('calendar_type') == 'Veldwedstrijd']),
-            'jachthondenproef': len([m for m in tier2_matches if m.get('calendar_type') == 'Jachthondenproef']),
-            'orweja_werktest': len([m for m in tier2_matches if m.get('calendar_type') == 'ORWEJA Werktest'])
+            'veldwedstrijd': match_counts.get('Veldwedstrijd', 0),
+            'jachthondenproef': match_counts.get('Jachthondenproef', 0),
+            'orweja_werktest': match_counts.get('ORWEJA Werktest', 0)
         },
-        'final_matches': len(final_matches),
-        'matches_uploaded': len(final_matches),
+        'final_matches': tier2_total,
+        'streamed': stream_refresh,
+        'matches_uploaded': (sync_stats['inserted'] + sync_stats['updated']) if sync_stats else 0,
+        'sync': sync_stats,
+        'changed_calendars': [c['name'] for c in changed_calendars],
+        'skipped_calendars': skipped_calendars,
+        'failed_calendars': failed_calendars,
+        # A run that lost calendars to errors or an open circuit only holds partial results
+        'partial_results': bool(failed_calendars) or sync_failed,
+        'sync_failed': sync_failed,
+        'calendar_errors': {r['calendar']['name']: r['error'] for r in calendar_results if r.get('error')},
+        'transport': scrape_result['transport'],
+        'probe': probe,
+        'enrichment': scrape_result['enrichment'],
+        'row_cache': scrape_result.get('row_cache'),
         'scraper_version': 'tier2_only',
         'timestamp': datetime.now().isoformat()
     }
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Incremental sync of scraped matches into Firestore
+
+Instead of deleting every match document and adding all scraped matches
+again (2 x N writes per run, and two storms of change events for every
+app listener), the stored documents are loaded once and diffed against
+the scraped set. Only the differences are written:
+  - insert: a scraped match without a document
+  - update: a document whose content differs from its scraped match
+  - delete: a document whose match is no longer scraped
+
+Match documents have content-addressed IDs: a hash of the normalized
+date, organizer, location and calendar type. The same match gets the same
+document ID on every run, so the diff is a lookup by ID, upserts are
+idempotent, and the app can key its caches on doc.id. Documents with
+other IDs (random add() IDs of earlier versions) are deleted and their
+matches inserted under their hash ID, once.
+
+Runs are published as generations, so readers never see a half-applied
+run (and never an empty calendar). A run writes its inserts tagged with
+the next generation and marks removed documents with retired_generation
+instead of deleting them. Changed matches keep their document (and ID):
+the new version is staged next to the current one, under staged with
+staged_generation. Once every write has landed the run flips a single
+pointer document (match_generation/current) to that generation. Readers
+show a document when its generation (if any) <= published and its
+retired_generation (if any) > published, and show its staged fields
+instead when staged_generation <= published. Right after publishing,
+the run folds the staged fields into their documents
+(fold_staged_matches), so queries on top-level fields see the published
+version too. The next run (collect_retired_matches) deletes the retired
+documents, when no reader needs them anymore.
+"""
+
+import hashlib
+import re
+from datetime import date, datetime
+
+from cell_cleaner import collapse_whitespace
+from firestore_writer import BatchedWriter
+
+MATCHES_COLLECTION = 'matches'
+
+# Pointer document holding the published generation, readable by the app
+GENERATION_COLLECTION = 'match_generation'
+GENERATION_DOCUMENT = 'current'
+
+# What identifies a match, in the order they are hashed
+IDENTITY_FIELDS = ('date', 'organizer', 'location', 'calendar_type')
+
+# Hex digits of the SHA-256 used as document ID (80 bits, the length of a Firestore auto ID)
+DOCUMENT_ID_LENGTH = 20
+
+# Bookkeeping fields, a document only counts as changed when another scraped field differs
+IGNORED_FIELDS = ('created_at', 'updated_at', 'generation')
+
+SYNC_OPERATIONS = ('inserted', 'updated', 'deleted', 'unchanged')
+
+# ISO date, optionally followed by a time ('2025-07-12', '2025-07-12 00:00:00', '2025-07-12T00:00:00')
+ISO_DATE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:[ T]|$)')
+
+def identity_date(value):
+    """A match date as YYYY-MM-DD, whether it is a date, a datetime or an ISO string"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value or '').strip()
+    iso_date = ISO_DATE_PATTERN.match(text)
+    return iso_date.group(1) if iso_date else text
+
+def match_identity(data):
+    """The normalized identity fields of a match, case, spacing and the date's type don't count"""
+    return '|'.join(
+        collapse_whitespace(identity_date(data.get(field)) if field == 'date' else str(data.get(field) or '')).casefold()
+        for field in IDENTITY_FIELDS
+    )
+
+def match_document_id(data, length=DOCUMENT_ID_LENGTH):
+    """Content-addressed document ID of a match (length=None: the full 64-digit hash)"""
+    digest = hashlib.sha256(match_identity(data).encode('utf-8')).hexdigest()
+    return digest[:length] if length else digest
+
+def changed_fields(stored, document):
+    """
+    The fields of document whose values differ from stored, bookkeeping fields aside
+
+    Only the scraped fields (the keys of the prepared document) count, so
+    fields written by others are left alone: the app's enrolledUsers and
+    synced_at, or the registration_details of an enriched run.
+    """
+    fields = set(document) - set(IGNORED_FIELDS)
+    return sorted(field for field in fields if stored.get(field) != document.get(field))
+
+def same_content(stored, document):
+    return not changed_fields(stored, document)
+
+def new_sync_stats():
+    return {operation: 0 for operation in SYNC_OPERATIONS}
+
+def add_sync_stats(total, stats):
+    for operation in SYNC_OPERATIONS:
+        total[operation] += stats.get(operation, 0)
+    return total
+
+def sync_succeeded(stats):
+    """Whether a sync (upload_to_firebase stats) wrote everything it had to write"""
+    return bool(stats) and not stats.get('aborted') and not (stats.get('writes') or {}).get('errors')
+
+def diff_matches(existing_docs, documents, generation=None):
+    """
+    Yield (operation, document ID, data, previous) turning existing_docs into documents
+
+    existing_docs are document snapshots, documents the prepared match data
+    (any iterable, consumed lazily so inserts and updates can be written
+    while it is still being produced). operation is one of SYNC_OPERATIONS;
+    data is None for deletes and unchanged documents, previous (the stored
+    version, its staged one when there is one) is None for inserts. Updates
+    keep the stored created_at. Deletes come last, once documents is
+    exhausted.
+    Inserts are tagged with generation (when given), updates keep the
+    stored one; a retired document whose match is back counts as updated.
+
+    Two identities sharing a short ID (in this run or with a stored
+    document) are a hash collision: the later one then uses the full hash.
+    """
+    stored = {doc.id: doc.to_dict() or {} for doc in existing_docs}
+
+    identities = {}
+    for document in documents:
+        identity = match_identity(document)
+        doc_id = match_document_id(document)
+
+        claimed = identities.get(doc_id)
+        if claimed == identity:
+            # Same match twice in the scraped set
+            continue
+        if claimed is not None or (doc_id in stored and match_identity(stored[doc_id]) != identity):
+            print(f"⚠️ Document ID collision on {doc_id} for '{identity}' - using the full hash")
+            doc_id = match_document_id(document, length=None)
+            if doc_id in identities:
+                continue
+        identities[doc_id] = identity
+
+        if doc_id not in stored:
+            if generation is not None:
+                document = dict(document, generation=generation)
+            yield 'inserted', doc_id, document, None
+            continue
+
+        data = current_version(stored.pop(doc_id))
+        if same_content(data, document) and data.get('retired_generation') is None:
+            yield 'unchanged', doc_id, None, data
+        else:
+            document = dict(document)
+            for field in ('created_at', 'generation'):
+                if field in data:
+                    document[field] = data[field]
+            document['updated_at'] = datetime.now()
+            yield 'updated', doc_id, document, data
+
+    for doc_id, data in stored.items():
+        yield 'deleted', doc_id, None, current_version(data)
+
+def current_version(data):
+    """The latest version of a stored match: its staged fields over the stored ones"""
+    if not isinstance(data.get('staged'), dict):
+        return data
+    version = {field: value for field, value in data.items() if field not in ('staged', 'staged_generation')}
+    version.update(data['staged'])
+    return version
+
+def staged_update(document, generation, previous):
+    """The write staging a changed match, readers see it once generation is published"""
+    update = {'staged': document, 'staged_generation': generation}
+    if previous.get('retired_generation') is not None:
+        # Back on the calendar before its retirement was published
+        update['retired_generation'] = None
+    return update
+
+def folded_update(data):
+    """The write replacing the fields of a document by its staged ones, other fields stay"""
+    return dict(data['staged'], staged=None, staged_generation=None)
+
+def load_generation_pointer(db):
+    """
+    (published generation, pending generation or None), raises when unreadable
+
+    A generation is pending from the first write of a run until it is
+    published; a run that failed or never finished leaves it pending, so
+    the next run publishes its documents.
+    """
+    doc = db.collection(GENERATION_COLLECTION).document(GENERATION_DOCUMENT).get()
+    pointer = (doc.to_dict() or {}) if doc.exists else {}
+    return pointer.get('generation', 0), pointer.get('pending')
+
+def hold_generation(db, generation):
+    """Record that documents of generation are being written"""
+    db.collection(GENERATION_COLLECTION).document(GENERATION_DOCUMENT).set({'pending': generation}, merge=True)
+
+def publish_generation(db, generation):
+    """Flip the pointer: readers now see the documents of generation"""
+    db.collection(GENERATION_COLLECTION).document(GENERATION_DOCUMENT).set({
+        'generation': generation,
+        'published_at': datetime.now()
+    })
+    print(f"🔀 Published match generation {generation}")
+
+def fold_staged_matches(db, published):
+    """
+    Fold the staged versions published by generation published (or earlier)
+    into their documents, returns how many documents were folded
+
+    Only the staged fields are written, so fields the scraper does not own
+    (e.g. the app's enrolledUsers) survive. Documents retired by then are
+    left to collect_retired_matches().
+    """
+    try:
+        writer = BatchedWriter(db)
+        folded = 0
+        try:
+            for doc in db.collection(MATCHES_COLLECTION).where('staged_generation', '<=', published).stream():
+                data = doc.to_dict() or {}
+                retired = data.get('retired_generation')
+                if retired is not None and retired <= published:
+                    continue
+                writer.update(doc.reference, folded_update(data))
+                folded += 1
+        finally:
+            writer.close()
+
+        if folded:
+            print(f"🧹 Folded in {folded} published updates")
+        return folded
+    except Exception as e:
+        print(f"⚠️ Error folding published updates: {e}")
+        return 0
+
+def collect_retired_matches(db):
+    """
+    Delete the documents retired by published generations and fold in the
+    published staged versions a run could not fold, returns how many
+    documents were collected
+    """
+    try:
+        published, _ = load_generation_pointer(db)
+        if not published:
+            return 0
+
+        writer = BatchedWriter(db)
+        collected = 0
+        try:
+            for doc in db.collection(MATCHES_COLLECTION).where('retired_generation', '<=', published).stream():
+                writer.delete(doc.reference)
+                collected += 1
+        finally:
+            writer.close()
+
+        if collected:
+            print(f"🧹 Collected {collected} retired matches")
+        fold_staged_matches(db, published)
+        return collected
+    except Exception as e:
+        print(f"⚠️ Error collecting retired matches: {e}")
+        return 0
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Match type classification
+Maps the raw ORWEJA match type text to the standardized types and acronyms
+
+The rules are declared per calendar type in MATCH_TYPE_RULES. Each calendar's
+rules are compiled into a single case-insensitive regex (one named group per
+rule), so a match type is scanned once instead of once per substring test.
+When several rules match, the first rule in the table wins, the same as the
+old if/elif chain. Acronyms only match as whole words, so 'tap' no longer
+fires inside e.g. 'Jachtapporteerproef'. Results are cached per (text, calendar).
+"""
+
+import re
+from functools import lru_cache
+
+# calendar_type -> [(normalized type, phrases, acronyms, details prefix)], first matching rule wins.
+# Phrases match anywhere in the text, acronyms only as whole words.
+MATCH_TYPE_RULES = {
+    'Veldwedstrijd': [
+        ('Veldwedstrijd', [], ['cacit'], 'Internationale kwalificatie'),
+        ('Veldwedstrijd', [], ['cac'], 'Kwalificatie'),
+    ],
+    'Jachthondenproef': [
+        ('SJP', ['standaard jachthonden'], ['sjp'], None),
+        ('MAP', ['middelgrote apporteur'], ['map'], None),
+        ('PJP', ['praktijk jacht', 'provinciale jachthonden'], ['pjp'], None),
+        ('TAP', ['terrier apporteur', 'team apporteer'], ['tap'], None),
+        ('KAP', ['kleine apporteur'], ['kap'], None),
+        ('SWT', ['stöberhunde', 'spaniël workingtest'], ['swt'], None),
+        ('OWT', ['orweja werktest'], ['owt'], None),
+    ],
+}
+
+# Type of rows no rule matches; calendars without an entry keep the original text
+DEFAULT_TYPES = {
+    'Veldwedstrijd': 'Veldwedstrijd',
+}
+
+def _compile_rules(rules):
+    """One alternation with a named group per rule"""
+    alternatives = []
+    for index, (_, phrases, acronyms, _) in enumerate(rules):
+        options = [re.escape(phrase) for phrase in phrases]
+        options += [rf'\b{re.escape(acronym)}\b' for acronym in acronyms]
+        alternatives.append(f"(?P<rule{index}>{'|'.join(options)})")
+    return re.compile('|'.join(alternatives), re.IGNORECASE)
+
+COMPILED_RULES = {
+    calendar_type: _compile_rules(rules)
+    for calendar_type, rules in MATCH_TYPE_RULES.items()
+}
+
+@lru_cache(maxsize=4096)
+def classify_match_type(match_type, calendar_type):
+    """
+    Normalize a match type for its calendar
+
+    Returns (normalized_type, match_details). match_details keeps the
+    qualification of field trials (e.g. 'Kwalificatie: CAC Zweetspoorproef
+    F') and is None otherwise.
+    """
+    pattern = COMPILED_RULES.get(calendar_type)
+    if pattern is None:
+        return match_type, None
+
+    rules = MATCH_TYPE_RULES[calendar_type]
+    best = None
+    for found in pattern.finditer(match_type):
+        index = int(found.lastgroup[len('rule'):])
+        if best is None or index < best:
+            best = index
+            if best == 0:
+                break
+
+    if best is None:
+        return DEFAULT_TYPES.get(calendar_type, match_type), None
+
+    normalized_type, _, _, details_prefix = rules[best]
+    match_details = f"{details_prefix}: {match_type}" if details_prefix else None
+    return normalized_type, match_details
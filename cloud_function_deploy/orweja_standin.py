@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Offline ORWEJA stand-in server
+Serves the captured ORWEJA pages so the login flow and the scrapers can be
+benchmarked and load-tested without network access
+
+Routes: /login (GET form, POST sets a session cookie), /home, /home/kalender/0..2
+(redirect to /login without a session) and /widget/kalender/.
+
+Usage:
+    python orweja_standin.py --port 8765 --latency 0.2 --error-rate 0.05 --rows 5000
+    ORWEJA_BASE_URL=http://127.0.0.1:8765 python run_scraper_local.py
+
+Record mode proxies every request to the real site and stores the fresh
+responses in the fixture directory:
+    python orweja_standin.py --record --fixtures ./orweja_fixtures
+"""
+
+import argparse
+import ast
+import hashlib
+import os
+import random
+import re
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+
+UPSTREAM_URL = 'https://my.orweja.nl'
+DEFAULT_FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+SESSION_COOKIE = 'orweja_standin_session'
+
+# Route -> fixture files, first existing file wins. Record mode writes the first name.
+ROUTE_FIXTURES = {
+    '/login': ['login_page.html', 'debug_login_page.html'],
+    '/home': ['home.html', 'debug_login_response.html'],
+    '/widget/kalender/': ['widget_kalender.html', 'debug_tier1_public.html'],
+    '/home/kalender/0': ['kalender_0.html', 'My ORWEJA proeven- en inschrijvingssysteem.html'],
+    '/home/kalender/1': ['kalender_1.html', 'My ORWEJA proeven- en inschrijvingssysteem.html'],
+    '/home/kalender/2': ['kalender_2.html', 'My ORWEJA proeven- en inschrijvingssysteem.html'],
+}
+PROTECTED_ROUTES = {'/home', '/home/kalender/0', '/home/kalender/1', '/home/kalender/2'}
+CALENDAR_ROUTES = {'/home/kalender/0', '/home/kalender/1', '/home/kalender/2'}
+
+ROW_PATTERN = re.compile(r'<tr class="kalrow".*?</tr>', re.DOTALL)
+ROW_DATE_PATTERN = re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})')
+ROW_ID_PATTERN = re.compile(r'data-id="\d+"')
+
+def load_fixture(path):
+    """Read a captured page; the debug_*.html captures are stored as Python bytes literals"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if content[:2] in (b"b'", b'b"'):
+        content = ast.literal_eval(content.decode('utf-8'))
+    return content
+
+def scale_calendar_rows(content, rows):
+    """
+    Repeat the calendar rows of a page until it holds `rows` rows
+
+    Every repetition is shifted past the date range of the previous one
+    and gets fresh data-id values, so the synthetic rows stay unique after
+    deduplication.
+    """
+    html = content.decode('utf-8', errors='replace')
+    templates = ROW_PATTERN.findall(html)
+    if not templates or rows <= 0:
+        return content
+
+    dates = []
+    for template in templates:
+        match = ROW_DATE_PATTERN.search(template)
+        if match:
+            dates.append(datetime(int(match.group(3)), int(match.group(2)), int(match.group(1))))
+    span = (max(dates) - min(dates)).days + 1 if dates else 1
+
+    generated = []
+    for index in range(rows):
+        template = templates[index % len(templates)]
+        shift = timedelta(days=span * (index // len(templates)))
+
+        def shift_date(match):
+            try:
+                day = datetime(int(match.group(3)), int(match.group(2)), int(match.group(1))) + shift
+                return day.strftime('%d-%m-%Y')
+            except ValueError:
+                return match.group(0)
+
+        row = ROW_DATE_PATTERN.sub(shift_date, template, count=1)
+        row = ROW_ID_PATTERN.sub(f'data-id="{900000 + index}"', row, count=1)
+        generated.append(row)
+
+    start = html.index(templates[0])
+    end = html.rindex(templates[-1]) + len(templates[-1])
+    return (html[:start] + ''.join(generated) + html[end:]).encode('utf-8')
+
+class StandinConfig:
+    """Behaviour knobs shared by all request handlers"""
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=503, rows=0, record=False, upstream=UPSTREAM_URL):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rows = rows
+        self.record = record
+        self.upstream = upstream.rstrip('/')
+        self.sessions = set()
+        self.request_count = 0
+        self.error_count = 0
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def page(self, route):
+        """Body for a route, loaded once and scaled when --rows is set"""
+        with self._lock:
+            if route in self._pages:
+                return self._pages[route]
+
+        for name in ROUTE_FIXTURES.get(route, []):
+            path = os.path.join(self.fixture_dir, name)
+            if not os.path.exists(path):
+                path = os.path.join(DEFAULT_FIXTURE_DIR, name)
+            if os.path.exists(path):
+                content = load_fixture(path)
+                if self.rows and route in CALENDAR_ROUTES:
+                    content = scale_calendar_rows(content, self.rows)
+                with self._lock:
+                    self._pages[route] = content
+                return content
+        return None
+
+    def store(self, route, content):
+        """Record mode: save a fresh response as the fixture of a route"""
+        path = os.path.join(self.fixture_dir, ROUTE_FIXTURES[route][0])
+        os.makedirs(self.fixture_dir, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        with self._lock:
+            self._pages.pop(route, None)
+        print(f"💾 Recorded {route} -> {path} ({len(content)} bytes)")
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Replays (or records) the ORWEJA routes the scrapers use"""
+
+    config = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method):
+        config = self.config
+        with config._lock:
+            config.request_count += 1
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        route = urlparse(self.path).path
+
+        if config.latency or config.jitter:
+            time.sleep(config.latency + random.uniform(0, config.jitter))
+
+        if config.error_rate and random.random() < config.error_rate:
+            with config._lock:
+                config.error_count += 1
+            self._send(config.error_status, b'injected error', {'Retry-After': '0'})
+            return
+
+        if config.record:
+            self._proxy(method, route, body)
+            return
+
+        if route == '/login' and method == 'POST':
+            token = secrets.token_hex(16)
+            with config._lock:
+                config.sessions.add(token)
+            self._send(302, b'', {
+                'Location': '/home',
+                'Set-Cookie': f'{SESSION_COOKIE}={token}; Path=/; HttpOnly'
+            })
+            return
+
+        if route in PROTECTED_ROUTES and not self._has_session():
+            self._send(302, b'', {'Location': '/login'})
+            return
+
+        content = config.page(route)
+        if content is None:
+            self._send(404, b'not found')
+            return
+
+        etag = '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, b'', {'ETag': etag})
+            return
+
+        self._send(200, content, {'Content-Type': 'text/html; charset=UTF-8', 'ETag': etag})
+
+    def _has_session(self):
+        for part in (self.headers.get('Cookie') or '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == SESSION_COOKIE and value in self.config.sessions:
+                return True
+        return False
+
+    def _proxy(self, method, route, body):
+        """Forward to the real site, relay the answer and keep successful pages"""
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() not in ('host', 'content-length', 'accept-encoding', 'connection')}
+        try:
+            response = requests.request(method, self.config.upstream + self.path, headers=headers,
+                                        data=body or None, allow_redirects=False, timeout=(5, 30))
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Upstream request failed for {route}: {e}")
+            self._send(502, str(e).encode('utf-8'))
+            return
+
+        if method == 'GET' and response.status_code == 200 and route in ROUTE_FIXTURES:
+            self.config.store(route, response.content)
+
+        relay = {}
+        location = response.headers.get('Location')
+        if location:
+            # Keep the client on the stand-in
+            relay['Location'] = location.replace(self.config.upstream, '')
+        cookies = [
+            re.sub(r';\s*(domain=[^;]*|secure)', '', cookie, flags=re.IGNORECASE)
+            for cookie in response.raw.headers.getlist('Set-Cookie')
+        ]
+        relay['Content-Type'] = response.headers.get('Content-Type', 'text/html')
+        self._send(response.status_code, response.content, relay, cookies)
+
+    def _send(self, status, content, headers=None, cookies=()):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        for cookie in cookies:
+            self.send_header('Set-Cookie', cookie)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+
+def start_standin(host='127.0.0.1', port=0, **options):
+    """
+    Start the stand-in in a background thread
+
+    Returns (server, base_url); set ORWEJA_BASE_URL to base_url before
+    importing the scraper and call server.shutdown() when done.
+    """
+    config = StandinConfig(**options)
+    handler = type('ConfiguredStandinHandler', (StandinHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.config = config
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://{host}:{server.server_address[1]}"
+    print(f"🧪 ORWEJA stand-in listening on {base_url}")
+    return server, base_url
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline ORWEJA stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURE_DIR, help='fixture directory (record mode writes here)')
+    parser.add_argument('--latency', type=float, default=0.0, help='base delay per request in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random delay up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--rows', type=int, default=0, help='scale every calendar to this many synthetic rows')
+    parser.add_argument('--record', action='store_true', help='proxy to the real site and store fresh responses')
+    parser.add_argument('--upstream', default=UPSTREAM_URL)
+    args = parser.parse_args()
+
+    server, base_url = start_standin(
+        args.host,
+        args.port,
+        fixture_dir=args.fixtures,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rows=args.rows,
+        record=args.record,
+        upstream=args.upstream
+    )
+    print(f"👉 Run the scraper with ORWEJA_BASE_URL={base_url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        config = server.config
+        print(f"\n📊 Served {config.request_count} requests ({config.error_count} injected errors)")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Shared HTTP transport for all ORWEJA requests
+Pooled keep-alive session with per-phase timeouts, retries with
+exponential backoff + jitter and a per-host circuit breaker
+"""
+
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Per-phase timeouts in seconds: connecting should be fast, reading a
+# calendar page may take a while
+CONNECT_TIMEOUT = float(os.environ.get('ORWEJA_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.environ.get('ORWEJA_READ_TIMEOUT', '20'))
+
+# Retry policy
+MAX_RETRIES = int(os.environ.get('ORWEJA_MAX_RETRIES', '3'))
+BACKOFF_BASE = float(os.environ.get('ORWEJA_BACKOFF_BASE', '0.5'))
+BACKOFF_MAX = float(os.environ.get('ORWEJA_BACKOFF_MAX', '8'))
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Circuit breaker: stop hammering a host after this many failed requests in a row
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('ORWEJA_BREAKER_THRESHOLD', '5'))
+BREAKER_COOLDOWN = float(os.environ.get('ORWEJA_BREAKER_COOLDOWN', '60'))
+
+# Connection pool, sized for the concurrent calendar and detail fetches
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = int(os.environ.get('ORWEJA_POOL_MAXSIZE', '10'))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+def _supported_encodings():
+    """Only advertise brotli when a decoder is installed, urllib3 can't decode it otherwise"""
+    try:
+        import brotli  # noqa: F401
+        return 'gzip, deflate, br'
+    except ImportError:
+        pass
+    try:
+        import brotlicffi  # noqa: F401
+        return 'gzip, deflate, br'
+    except ImportError:
+        return 'gzip, deflate'
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of a request while the circuit of a host is open"""
+
+class CircuitBreaker:
+    """Per-host circuit breaker, shared by all threads using one session"""
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, host):
+        """Raise CircuitOpenError when the host is still cooling down"""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return
+            if time.time() - opened_at < self.cooldown:
+                raise CircuitOpenError(f"Circuit open for {host} - skipping request")
+            # Half-open: let this request through as a probe
+            del self._opened_at[host]
+            self._failures[host] = self.failure_threshold - 1
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures[host] = 0
+
+    def record_failure(self, host):
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.failure_threshold and host not in self._opened_at:
+                self._opened_at[host] = time.time()
+                print(f"🚧 Circuit opened for {host} after {self._failures[host]} failures")
+
+    def is_open(self, host):
+        with self._lock:
+            return host in self._opened_at
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+class OrwejaSession(requests.Session):
+    """
+    requests.Session with the ORWEJA transport policy built in
+
+    Every request gets (connect, read) timeouts unless the caller passes
+    its own, transient failures (connection errors, timeouts, 429/5xx) are
+    retried with exponential backoff + jitter, and a per-host circuit
+    breaker fails fast once a host keeps failing so a run can return the
+    calendars it did get.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, breaker=None):
+        super().__init__()
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.request_count = 0
+        self.retry_count = 0
+
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+        self.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': _supported_encodings(),
+            'Connection': 'keep-alive'
+        })
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+        host = urlparse(url).netloc
+        # Only idempotent requests are retried after the server saw them
+        idempotent = method.upper() in ('GET', 'HEAD', 'OPTIONS')
+
+        attempt = 0
+        while True:
+            self.breaker.before_request(host)
+            self.request_count += 1
+
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not idempotent:
+                    self.breaker.record_failure(host)
+                    raise
+                error = e
+            else:
+                if response.status_code in RETRY_STATUS_CODES:
+                    error = None
+                    self.breaker.record_failure(host)
+                    if not idempotent or attempt >= self.max_retries:
+                        return response
+                    response.close()
+                else:
+                    self.breaker.record_success(host)
+                    return response
+
+            if error is not None:
+                self.breaker.record_failure(host)
+                if attempt >= self.max_retries:
+                    raise error
+
+            delay = backoff_delay(attempt)
+            if error is not None:
+                reason = type(error).__name__
+            else:
+                reason = f"HTTP {response.status_code}"
+                # Honour Retry-After on 429/503 when the server sends one
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = min(BACKOFF_MAX, float(retry_after))
+
+            attempt += 1
+            self.retry_count += 1
+            print(f"🔁 Retry {attempt}/{self.max_retries} for {url} in {delay:.2f}s ({reason})")
+            time.sleep(delay)
+
+    def stats(self):
+        """Request/retry counters for the run summary"""
+        return {
+            'requests': self.request_count,
+            'retries': self.retry_count
+        }
+
+def create_session():
+    """Create a new pooled ORWEJA session"""
+    return OrwejaSession()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Row-level parse cache
+Parsed, cleaned and classified match records by calendar row hash
+
+A calendar changes by a handful of rows per day, so most rows of a run
+were already parsed by the previous one. The cache maps the hash of a
+row's (text, href) cells to the match record parse_calendar_row() built
+for it (or None for rows that are no match), and the scraper only runs
+the cell pipeline for rows it has not seen before.
+
+One Firestore document per calendar holds the rows of its last run; rows
+that disappeared from the calendar are dropped when it is stored again.
+The document carries a fingerprint of the parser rules, so changing them
+invalidates the cache.
+"""
+
+import hashlib
+import os
+from datetime import date, datetime
+
+ROW_CACHE_COLLECTION = 'row_parse_cache'
+
+ROW_CACHE_ENABLED = os.environ.get('ORWEJA_ROW_CACHE', 'true').lower() == 'true'
+# Firestore documents are capped at 1 MiB, rows beyond this many bytes are not stored
+ROW_CACHE_MAX_BYTES = int(os.environ.get('ROW_CACHE_MAX_BYTES', str(900 * 1024)))
+
+def row_hash(row_bytes):
+    """Cache key of a row, row_bytes is the repr() of its cells"""
+    return hashlib.sha256(row_bytes).hexdigest()[:32]
+
+def _stored_size(value):
+    """Bytes Firestore counts for a value against the document size limit"""
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, dict):
+        return sum(_stored_size(name) + _stored_size(item) for name, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_stored_size(item) for item in value)
+    if value is None or isinstance(value, bool):
+        return 1
+    return 8  # Numbers and timestamps
+
+def _encode_record(record):
+    """Firestore stores datetimes but not dates"""
+    if record is None:
+        return None
+    encoded = dict(record)
+    if isinstance(encoded.get('date'), date):
+        encoded['date'] = encoded['date'].isoformat()
+    return encoded
+
+def _decode_record(encoded):
+    """A fresh match dict for every hit, callers may modify it"""
+    if encoded is None:
+        return None
+    record = dict(encoded)
+    if isinstance(record.get('date'), str):
+        record['date'] = date.fromisoformat(record['date'])
+    return record
+
+class RowParseCache:
+    """Encoded match records of one calendar by row hash, with hit/miss counts"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        self.seen = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """(True, record) on a hit, (False, None) on a miss"""
+        if key in self.entries:
+            self.hits += 1
+            self.seen[key] = self.entries[key]
+            return True, _decode_record(self.entries[key])
+        self.misses += 1
+        return False, None
+
+    def put(self, key, record):
+        self.seen[key] = _encode_record(record)
+
+    @property
+    def changed(self):
+        """New rows were parsed or old ones disappeared"""
+        return bool(self.misses) or len(self.seen) != len(self.entries)
+
+    def stats(self):
+        return {'rows': self.hits + self.misses, 'hits': self.hits, 'misses': self.misses}
+
+def load_row_cache(db, key, fingerprint):
+    """The cache stored for a calendar, empty when missing, unavailable or stale"""
+    if not db:
+        return RowParseCache()
+
+    try:
+        doc = db.collection(ROW_CACHE_COLLECTION).document(key).get()
+        if not doc.exists:
+            return RowParseCache()
+        cached = doc.to_dict() or {}
+        if cached.get('fingerprint') != fingerprint:
+            print(f"♻️ Row cache '{key}' was built by other parser rules - starting over")
+            return RowParseCache()
+        return RowParseCache({row['hash']: row.get('match') for row in cached.get('rows', [])})
+    except Exception as e:
+        print(f"⚠️ Error reading row cache '{key}': {e}")
+        return RowParseCache()
+
+def store_row_cache(db, key, cache, fingerprint):
+    """Replace the stored cache with the rows seen this run, returns True when written"""
+    if not db or not cache.changed:
+        return False
+
+    rows = []
+    size = 0
+    for row_key, record in cache.seen.items():
+        row = {'hash': row_key, 'match': record}
+        size += _stored_size(row)
+        if size > ROW_CACHE_MAX_BYTES:
+            print(f"⚠️ Row cache '{key}' is full - {len(cache.seen) - len(rows)} rows not stored")
+            break
+        rows.append(row)
+
+    try:
+        # set() without merge, so rows that left the calendar are dropped
+        db.collection(ROW_CACHE_COLLECTION).document(key).set({
+            'fingerprint': fingerprint,
+            'rows': rows,
+            'updated_at': datetime.now()
+        })
+        return True
+    except Exception as e:
+        print(f"⚠️ Error writing row cache '{key}': {e}")
+        return False
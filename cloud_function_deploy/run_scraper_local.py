@@ -12,9 +12,11 @@ os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = '/Users/florisvanderhart/Document
 
 # Import the main scraper functions
 from main import (
+    TIER2_CALENDARS,
     initialize_firebase,
-    scrape_tier2_protected_calendars,
+    run_tier2_scrape,
     upload_to_firebase,
+    stream_tier2_to_firebase,
     mark_past_matches_as_closed
 )
 
@@ -32,7 +34,8 @@ def run_scraper():
     
     # Step 1: Scrape Tier 2 (protected calendars with hunt type data)
     print("📅 Scraping ORWEJA protected calendars...")
-    tier2_matches = scrape_tier2_protected_calendars()
+    scrape_result = run_tier2_scrape(conditional=False)
+    tier2_matches = scrape_result['matches']
     
     if not tier2_matches:
         print("❌ No matches found in Tier 2")
@@ -40,9 +43,17 @@ def run_scraper():
     
     print(f"✅ Found {len(tier2_matches)} matches from Tier 2")
     
-    # Step 2: Upload to Firebase 
+    # Step 2: Upload to Firebase, calendars that failed keep their documents
+    scraped_calendars = [r['calendar'] for r in scrape_result['calendar_results'] if r['status'] == 'changed']
+    failed_calendars = [r['calendar']['name'] for r in scrape_result['calendar_results'] if r['status'] == 'error']
+    if failed_calendars:
+        print(f"⚠️ Failed calendars keep their documents: {', '.join(failed_calendars)}")
+    
     print("💾 Uploading matches to Firebase...")
-    upload_to_firebase(tier2_matches)
+    if len(scraped_calendars) == len(TIER2_CALENDARS):
+        upload_to_firebase(tier2_matches)
+    else:
+        upload_to_firebase(tier2_matches, calendar_types=[c['calendar_type'] for c in scraped_calendars])
     
     # Step 3: Mark past matches as closed
     print("🔒 Marking past matches as closed...")
@@ -60,5 +71,30 @@ def run_scraper():
     for match_type, count in sorted(type_counts.items()):
         print(f"  {match_type}: {count}")
 
+def run_streaming_scraper():
+    """Full refresh that writes matches to Firebase while the calendars are still being parsed"""
+    print("🚀 Starting JachtProef Alert Scraper (Local, streaming)...")
+    print("=" * 50)
+    
+    if not initialize_firebase():
+        print("❌ Firebase initialization failed - cannot proceed")
+        return
+    
+    sync_stats = stream_tier2_to_firebase()
+    if sync_stats is None:
+        return
+    
+    if sync_stats['failed_calendars']:
+        print(f"⚠️ Failed calendars keep their documents: {', '.join(sync_stats['failed_calendars'])}")
+    
+    print("🔒 Marking past matches as closed...")
+    mark_past_matches_as_closed()
+    
+    print(f"🎉 Scraper completed successfully! ({sync_stats['inserted']} inserted, {sync_stats['updated']} updated, "
+          f"{sync_stats['deleted']} deleted, {sync_stats['unchanged']} unchanged)")
+
 if __name__ == "__main__":
-    run_scraper() 
\ No newline at end of file
+    if '--stream' in sys.argv:
+        run_streaming_scraper()
+    else:
+        run_scraper() 
\ No newline at end of file
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Adaptive scrape scheduler
+Plans targeted re-scrapes around registration openings ("vanaf 22-06-2025 19:00")
+
+The full scrape keeps its low baseline schedule (once a day). A second,
+cheap Cloud Scheduler job calls the function every few minutes with
+{"mode": "tick"}; a tick only reads the schedule document and does
+nothing unless a planned slot is due, in which case it scrapes just the
+calendar(s) of the matches that open around that time.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+from date_parsing import ORWEJA_TIMEZONE, parse_registration_opening
+from scraper_state import load_state, save_state
+
+SCHEDULE_STATE_KEY = 'scrape_schedule'
+
+# Targeted runs: one shortly before an opening, one shortly after
+SLOT_LEAD_MINUTES = int(os.environ.get('SCHEDULER_LEAD_MINUTES', '10'))
+SLOT_LAG_MINUTES = int(os.environ.get('SCHEDULER_LAG_MINUTES', '2'))
+# Openings that passed but still read "vanaf" are retried for a while
+RETRY_INTERVAL_MINUTES = int(os.environ.get('SCHEDULER_RETRY_MINUTES', '15'))
+RETRY_WINDOW_HOURS = int(os.environ.get('SCHEDULER_RETRY_WINDOW_HOURS', '2'))
+# Only plan this far ahead; the daily baseline run re-plans anyway
+SCHEDULE_HORIZON_DAYS = int(os.environ.get('SCHEDULER_HORIZON_DAYS', '14'))
+
+def load_pending_openings(db):
+    """Read the stored matches that are still waiting for their registration to open"""
+    openings = []
+    if not db:
+        return openings
+
+    try:
+        # Prefix range query on registration_text, covered by the automatic single-field index
+        pending = (db.collection('matches')
+                   .where('registration_text', '>=', 'vanaf')
+                   .where('registration_text', '<', 'vanag')
+                   .stream())
+        for doc in pending:
+            match = doc.to_dict()
+            # Stored by the scraper since registration_opens_at exists, parsed for older documents
+            opens_at = match.get('registration_opens_at') or parse_registration_opening(match.get('registration_text'))
+            if opens_at and match.get('calendar_type'):
+                openings.append({'calendar_type': match['calendar_type'], 'opens_at': opens_at})
+    except Exception as e:
+        print(f"⚠️ Error loading pending registration openings: {e}")
+
+    return openings
+
+def plan_targeted_scrapes(openings, now=None):
+    """
+    Turn registration openings into scrape slots
+
+    Each opening gets a slot just before and just after it; openings that
+    already passed (but were still pending at the last scrape) get a retry
+    slot. Slots of the same calendar at the same minute are merged.
+    """
+    now = now or datetime.now(ORWEJA_TIMEZONE)
+    horizon = now + timedelta(days=SCHEDULE_HORIZON_DAYS)
+    slots = {}
+
+    def add_slot(calendar_type, run_at, opens_at):
+        if run_at < now or run_at > horizon:
+            return
+        run_at = run_at.replace(second=0, microsecond=0)
+        key = (calendar_type, run_at)
+        slot = slots.setdefault(key, {
+            'calendar_type': calendar_type,
+            'run_at': run_at.timestamp(),
+            'opens_at': opens_at.timestamp(),
+            'openings': 0
+        })
+        slot['openings'] += 1
+
+    for opening in openings:
+        opens_at = opening['opens_at']
+        calendar_type = opening['calendar_type']
+
+        if opens_at > now:
+            add_slot(calendar_type, opens_at - timedelta(minutes=SLOT_LEAD_MINUTES), opens_at)
+            add_slot(calendar_type, opens_at + timedelta(minutes=SLOT_LAG_MINUTES), opens_at)
+        elif now - opens_at < timedelta(hours=RETRY_WINDOW_HOURS):
+            # Opening passed but the calendar still said "vanaf": check again soon
+            add_slot(calendar_type, now + timedelta(minutes=RETRY_INTERVAL_MINUTES), opens_at)
+
+    return sorted(slots.values(), key=lambda slot: slot['run_at'])
+
+def save_schedule(db, slots):
+    """Replace the stored schedule"""
+    if save_state(db, SCHEDULE_STATE_KEY, {'slots': slots, 'planned_at': time.time()}):
+        if slots:
+            next_run = datetime.fromtimestamp(slots[0]['run_at'], ORWEJA_TIMEZONE)
+            print(f"🗓️ Planned {len(slots)} targeted scrapes (next: {next_run.isoformat()})")
+        else:
+            print("🗓️ No targeted scrapes planned")
+
+def replan_schedule(db):
+    """Plan the targeted scrapes from the matches currently stored in Firestore"""
+    slots = plan_targeted_scrapes(load_pending_openings(db))
+    save_schedule(db, slots)
+    return slots
+
+def take_due_slots(db, now=None):
+    """
+    Remove and return the slots that are due
+
+    Returns the calendar types to scrape now (empty when nothing is due).
+    """
+    now = now or datetime.now(ORWEJA_TIMEZONE)
+    schedule = load_state(db, SCHEDULE_STATE_KEY)
+    slots = schedule.get('slots', [])
+
+    due = [slot for slot in slots if slot['run_at'] <= now.timestamp()]
+    if not due:
+        return []
+
+    remaining = [slot for slot in slots if slot['run_at'] > now.timestamp()]
+    save_state(db, SCHEDULE_STATE_KEY, {'slots': remaining})
+
+    calendar_types = []
+    for slot in due:
+        if slot['calendar_type'] not in calendar_types:
+            calendar_types.append(slot['calendar_type'])
+
+    print(f"⏰ {len(due)} scheduled slot(s) due for: {', '.join(calendar_types)}")
+    return calendar_types
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Scraper state storage
+Small Firestore documents that survive between scraper invocations
+(cached ORWEJA session, fetch validators, fingerprints, ...)
+"""
+
+from datetime import datetime
+
+# All scraper bookkeeping lives in its own collection, away from `matches`
+SCRAPER_STATE_COLLECTION = 'scraper_state'
+
+def load_state(db, key):
+    """Load a state document, returns an empty dict when missing or unavailable"""
+    if not db:
+        return {}
+
+    try:
+        doc = db.collection(SCRAPER_STATE_COLLECTION).document(key).get()
+        if doc.exists:
+            return doc.to_dict() or {}
+    except Exception as e:
+        print(f"⚠️ Error loading scraper state '{key}': {e}")
+
+    return {}
+
+def save_state(db, key, data):
+    """Store (merge) a state document, returns True on success"""
+    if not db:
+        return False
+
+    try:
+        state = dict(data)
+        state['updated_at'] = datetime.now()
+        db.collection(SCRAPER_STATE_COLLECTION).document(key).set(state, merge=True)
+        return True
+    except Exception as e:
+        print(f"⚠️ Error saving scraper state '{key}': {e}")
+        return False
+
+def clear_state(db, key):
+    """Delete a state document"""
+    if not db:
+        return False
+
+    try:
+        db.collection(SCRAPER_STATE_COLLECTION).document(key).delete()
+        return True
+    except Exception as e:
+        print(f"⚠️ Error clearing scraper state '{key}': {e}")
+        return False
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+JachtProef Alert - Date-blocked candidate index for tier-1/tier-2 matching
+
+Two entries can only match when they are on the same date, so instead of
+comparing every tier-1 entry with every tier-2 entry the tier-2 entries are
+grouped by date once, with their organizer normalized once, and a tier-1
+entry is only compared within its own date block.
+"""
+
+def build_date_index(matches, normalize=None):
+    """
+    date -> [(normalized organizer, match)] in the original order
+
+    Keeping the order within a block means a best-match search over a block
+    breaks ties exactly like a scan over the whole list did.
+    """
+    index = {}
+    for match in matches:
+        organizer = match['organizer']
+        index.setdefault(match['date'], []).append((normalize(organizer) if normalize else organizer, match))
+    return index
@@ -10,6 +10,8 @@ import json
 from datetime import datetime
 import firebase_admin
 from firebase_admin import firestore
+from firestore_writer import BatchedWriter
+from match_sync import match_document_id
 
 def initialize_firebase_with_cli():
     """Initialize Firebase using CLI authentication"""
@@ -104,30 +106,33 @@ def upload_real_matches(db, matches):
     """Upload real ORWEJA matches to Firebase"""
     print("💾 Uploading real ORWEJA matches to Firestore...")
     
-    # Clear existing matches first
+    matches_collection = db.collection('matches')
+    writer = BatchedWriter(db)
+    
+    # Content-addressed document IDs, the same ones the scraper sync uses
+    documents = {match_document_id(match): match for match in matches}
+    
+    # Clear the other existing matches first, documents being uploaded are overwritten
+    deleted = 0
     try:
-        existing_matches = db.collection('matches').stream()
-        for match in existing_matches:
-            match.reference.delete()
-        print("🗑️ Cleared existing sample matches")
+        for match in matches_collection.stream():
+            if match.id not in documents:
+                writer.delete(match.reference)
+                deleted += 1
+        print(f"🗑️ Cleared {deleted} existing sample matches")
     except Exception as e:
         print(f"⚠️ Error clearing existing matches: {e}")
     
-    # Upload real matches
-    success_count = 0
-    error_count = 0
+    # Upload real matches in 500-document batches
+    for doc_id, match in documents.items():
+        writer.set(matches_collection.document(doc_id), match)
+        print(f"➕ Added: {match['organizer'][:50]}... - {match['type']} - {match['date']}")
     
-    for match in matches:
-        try:
-            # Add to Firestore
-            doc_ref = db.collection('matches').add(match)
-            print(f"➕ Added: {match['organizer'][:50]}... - {match['type']} - {match['date']}")
-            success_count += 1
-        except Exception as e:
-            print(f"❌ Error uploading match {match.get('organizer', 'Unknown')}: {e}")
-            error_count += 1
-    
-    print(f"✅ Successfully uploaded {success_count}/{len(matches)} real ORWEJA matches")
+    stats = writer.close()
+    success_count = stats['writes'] - deleted
+    error_count = len(documents) - success_count
+    
+    print(f"✅ Successfully uploaded {success_count}/{len(documents)} real ORWEJA matches")
     if error_count > 0:
         print(f"❌ Failed to upload {error_count} matches")
     
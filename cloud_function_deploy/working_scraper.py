@@ -17,14 +17,22 @@ import re
 import os
 from difflib import SequenceMatcher
 import time
-import html
-import unicodedata
 import csv
+from orweja_transport import create_session
+from calendar_html import calendar_table
+from cell_cleaner import normalize_organizer
+from match_types import classify_match_type
+from date_parsing import parse_calendar_date
+from tier_matching import build_date_index
+from match_sync import match_document_id
 
 # ORWEJA CREDENTIALS for protected calendar access
 ORWEJA_USERNAME = "Jacqueline vd Hart-Snelle"
 ORWEJA_PASSWORD = "Jindi11Leia"
 
+# ORWEJA host; point ORWEJA_BASE_URL at orweja_standin.py to run without network access
+ORWEJA_BASE_URL = os.environ.get('ORWEJA_BASE_URL', 'https://my.orweja.nl').rstrip('/')
+
 # Initialize Firebase (for testing, we'll handle this separately)
 db = None
 
@@ -44,37 +52,12 @@ def initialize_firebase():
 def normalize_org(org):
     """
     Comprehensive text normalization for organizer names
+    (HTML entities/tags, unicode, case, punctuation, whitespace)
     """
     if not org:
         return ""
     
-    # Convert to string if needed
-    org = str(org)
-    
-    # Remove HTML entities (like &nbsp;, &amp;, etc.)
-    org = html.unescape(org)
-    
-    # Remove HTML tags
-    org = re.sub(r'<[^>]+>', '', org)
-    
-    # Normalize unicode characters (handle accents, etc.)
-    org = unicodedata.normalize('NFKC', org)
-    
-    # Remove extra whitespace and normalize
-    org = re.sub(r'\s+', ' ', org)
-    org = org.strip()
-    
-    # Convert to lowercase for comparison
-    org = org.lower()
-    
-    # Remove common punctuation that might interfere
-    org = re.sub(r'[^\w\s]', '', org)
-    
-    # Remove extra spaces again after punctuation removal
-    org = re.sub(r'\s+', ' ', org)
-    org = org.strip()
-    
-    return org
+    return normalize_organizer(str(org))
 
 def similarity(s1, s2):
     """
@@ -113,14 +96,11 @@ def scrape_tier1_public_calendar():
     """
     print("🔍 Tier 1: Scraping public calendar...")
     
-    url = "https://my.orweja.nl/widget/kalender/"
+    url = f"{ORWEJA_BASE_URL}/widget/kalender/"
     
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
+        # The shared transport sets the User-Agent, timeouts and retries
+        response = create_session().get(url)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -199,19 +179,18 @@ def scrape_tier2_protected_calendars():
     protected_matches = []
     
     protected_urls = [
-        ("https://my.orweja.nl/home/kalender/0", "Veldwedstrijd"),
-        ("https://my.orweja.nl/home/kalender/1", "Jachthondenproef"),
-        ("https://my.orweja.nl/home/kalender/2", "ORWEJA Werktest")
+        (f"{ORWEJA_BASE_URL}/home/kalender/0", "Veldwedstrijd"),
+        (f"{ORWEJA_BASE_URL}/home/kalender/1", "Jachthondenproef"),
+        (f"{ORWEJA_BASE_URL}/home/kalender/2", "ORWEJA Werktest")
     ]
     
     for url, calendar_type in protected_urls:
         try:
             print(f"📄 Scraping: {calendar_type}")
-            response = session.get(url, timeout=30)
+            response = session.get(url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            # Find the table with class 'table-hover'
-            table = soup.find('table', class_='table-hover')
+            # Find the table with class 'table-hover' (only that table is parsed)
+            table = calendar_table(response.content, table_class='table-hover')
             if not table:
                 print(f"❌ No table found for {calendar_type}")
                 continue
@@ -232,35 +211,7 @@ def scrape_tier2_protected_calendars():
                 reg_status = cells[5].get_text(strip=True)
                 
                 # NORMALIZE MATCH TYPES: Convert to standardized types and acronyms
-                normalized_type = match_type
-                
-                if calendar_type == 'Veldwedstrijd':
-                    # For Veldwedstrijd calendar, normalize CAC/CACIT to "Veldwedstrijd"
-                    if match_type.upper().startswith('CACIT') or 'CACIT' in match_type.upper():
-                        normalized_type = 'Veldwedstrijd'
-                    elif match_type.upper().startswith('CAC') or 'CAC' in match_type.upper():
-                        normalized_type = 'Veldwedstrijd'
-                    else:
-                        normalized_type = 'Veldwedstrijd'
-                elif calendar_type == 'Jachthondenproef':
-                    # Convert long names to acronyms for Jachthondenproef calendar
-                    if 'standaard jachthonden' in match_type.lower() or 'standaard jachthondenproef' in match_type.lower():
-                        normalized_type = 'SJP'
-                    elif 'middelgrote apporteur' in match_type.lower() or 'map' in match_type.lower():
-                        normalized_type = 'MAP'
-                    elif 'praktijk jacht' in match_type.lower() or 'pjp' in match_type.lower() or 'provinciale jachthonden' in match_type.lower():
-                        normalized_type = 'PJP'
-                    elif 'terrier apporteur' in match_type.lower() or 'team apporteer' in match_type.lower() or 'tap' in match_type.lower():
-                        normalized_type = 'TAP'
-                    elif 'kleine apporteur' in match_type.lower() or 'kap' in match_type.lower():
-                        normalized_type = 'KAP'
-                    elif 'stöberhunde' in match_type.lower() or 'swt' in match_type.lower() or 'spaniël workingtest' in match_type.lower():
-                        normalized_type = 'SWT'
-                    elif 'orweja werktest' in match_type.lower() or 'owt' in match_type.lower():
-                        normalized_type = 'OWT'
-                    # If no specific match, keep original but clean it
-                    else:
-                        normalized_type = match_type
+                normalized_type, _ = classify_match_type(match_type, calendar_type)
                 
                 match_data = {
                     'date': parse_date(date_text),
@@ -283,12 +234,12 @@ def authenticate_orweja():
     """Authenticate with ORWEJA for protected calendar access"""
     print("🔐 Authenticating with ORWEJA...")
     
-    session = requests.Session()
+    session = create_session()
     
     try:
         # Get login page
-        login_url = "https://my.orweja.nl/login"
-        response = session.get(login_url, timeout=30)
+        login_url = f"{ORWEJA_BASE_URL}/login"
+        response = session.get(login_url)
         response.raise_for_status()
         
         # Parse login form to get correct field names
@@ -325,13 +276,13 @@ def authenticate_orweja():
         }
         
         # Submit login
-        response = session.post(login_url, data=login_data, timeout=30, allow_redirects=True)
+        response = session.post(login_url, data=login_data, allow_redirects=True)
         
         print(f"📊 Login response status: {response.status_code}")
         
         # Check if login was successful by trying to access a protected page
-        test_url = "https://my.orweja.nl/home/kalender/1"
-        test_response = session.get(test_url, timeout=30)
+        test_url = f"{ORWEJA_BASE_URL}/home/kalender/1"
+        test_response = session.get(test_url)
         
         print(f"📊 Test protected page status: {test_response.status_code}")
         
@@ -353,38 +304,25 @@ def authenticate_orweja():
         return None
 
 def parse_date(date_text):
-    """Parse date from various formats"""
-    try:
-        # Common Dutch date formats
-        formats = [
-            '%d-%m-%Y',  # 12-07-2025
-            '%Y-%m-%d',  # 2025-07-12
-            '%d/%m/%Y',  # 12/07/2025
-            '%Y/%m/%d',  # 2025/07/12
-            '%d-%m-%y',  # 12-07-25
-            '%d/%m/%y',  # 12/07/25
-        ]
-        
-        date_text = date_text.strip()
-        
-        for fmt in formats:
-            try:
-                parsed_date = datetime.strptime(date_text, fmt)
-                return parsed_date
-            except ValueError:
-                continue
-        
-        # If no format matches, return as string
+    """
+    Parse date from various formats
+    
+    DD-MM-YYYY, YYYY-MM-DD, '/' separated and two-digit years, see
+    date_parsing.parse_calendar_date(). Returns the text itself when it is
+    no date.
+    """
+    parsed_date = parse_calendar_date(date_text)
+    if parsed_date is None:
         print(f"⚠️ Could not parse date: '{date_text}'")
         return date_text
-        
-    except Exception as e:
-        print(f"⚠️ Date parsing error for '{date_text}': {e}")
-        return date_text
+    return datetime(parsed_date.year, parsed_date.month, parsed_date.day)
 
 def match_tier1_tier2(tier1_matches, tier2_matches):
     """
     Match Tier 1 and Tier 2 entries using date and organizer similarity
+    
+    Tier 2 is indexed by date once (organizers normalized once), and each
+    Tier 1 entry is only compared with the Tier 2 entries of its date.
     """
     print("🔗 Matching Tier 1 and Tier 2 entries...")
     
@@ -400,29 +338,29 @@ def match_tier1_tier2(tier1_matches, tier2_matches):
     total_comparisons = 0
     debug_samples = 0
     
+    # Date -> Tier 2 candidates with their normalized organizer
+    tier2_by_date = build_date_index(tier2_matches, normalize_org)
+    
     for tier1_match in tier1_matches:
         best_match = None
         best_similarity = 0
         norm_t1_org = normalize_org(tier1_match['organizer'])
-        date_matches = 0
-        
-        for tier2_match in tier2_matches:
-            # Check date similarity
-            if tier1_match['date'] == tier2_match['date']:
-                date_matches += 1
-                total_date_matches += 1
-                norm_t2_org = normalize_org(tier2_match['organizer'])
-                org_similarity = similarity(norm_t1_org, norm_t2_org)
-                total_comparisons += 1
-                
-                # Debug: Show first few comparisons
-                if debug_samples < 5:
-                    print(f"  🔍 Compare: '{norm_t1_org[:30]}' <-> '{norm_t2_org[:30]}' = {org_similarity:.3f}")
-                    debug_samples += 1
+        
+        candidates = tier2_by_date.get(tier1_match['date'], [])
+        total_date_matches += len(candidates)
+        
+        for norm_t2_org, tier2_match in candidates:
+            org_similarity = similarity(norm_t1_org, norm_t2_org)
+            total_comparisons += 1
+            
+            # Debug: Show first few comparisons
+            if debug_samples < 5:
+                print(f"  🔍 Compare: '{norm_t1_org[:30]}' <-> '{norm_t2_org[:30]}' = {org_similarity:.3f}")
+                debug_samples += 1
                 
-                if org_similarity > 0.5 and org_similarity > best_similarity:  # Keep 50% threshold
-                    best_match = tier2_match
-                    best_similarity = org_similarity
+            if org_similarity > 0.5 and org_similarity > best_similarity:  # Keep 50% threshold
+                best_match = tier2_match
+                best_similarity = org_similarity
         
         if best_match:
             combined_match = {
@@ -465,8 +403,8 @@ def upload_to_firebase(matches):
         
         for match in matches:
             try:
-                # Create document ID from date and organizer
-                doc_id = f"{match['date'].strftime('%Y-%m-%d')}_{match['organizer'].replace(' ', '_')}"
+                # Content-addressed ID (date, organizer, location, calendar type), see match_sync.py
+                doc_id = match_document_id(match)
                 
                 # Add metadata
                 match['scraped_at'] = datetime.now()
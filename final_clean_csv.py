@@ -6,25 +6,16 @@ Create a final clean CSV with better data cleaning
 import csv
 import re
 from datetime import datetime
+import os
+import sys
+
+# The shared cell cleaner lives with the Cloud Function source
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cloud_function_deploy'))
+from cell_cleaner import clean_export_field
 
 def clean_field(text):
     """Clean up field data by removing line breaks and extra spaces"""
-    if not text:
-        return ""
-    
-    # Remove line breaks and extra whitespace
-    text = re.sub(r'\\n|\\r|\n|\r', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    text = text.strip()
-    
-    # Remove escaped characters
-    text = text.replace('\\"', '"')
-    text = text.replace('\\\\', '\\')
-    
-    # Remove "i.s.m:" patterns (collaboration indicators)
-    text = re.sub(r'i\.s\.m:\s*', '', text)
-    
-    return text
+    return clean_export_field(text)
 
 def extract_and_clean_matches():
     """Extract all matches with better cleaning"""
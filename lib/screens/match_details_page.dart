@@ -1130,6 +1130,15 @@ Gedeeld via JachtProef Alert 📱''';
   }
 
   DateTime? _getEnrollmentOpeningDate(Map<String, dynamic> match) {
+    // Stored by the scraper; older documents only have the registration text
+    final opensAt = match['registration_opens_at'];
+    if (opensAt is Timestamp) return opensAt.toDate();
+    if (opensAt is DateTime) return opensAt;
+    if (opensAt is String) {
+      final parsed = DateTime.tryParse(opensAt);
+      if (parsed != null) return parsed.toLocal();
+    }
+    
     String regText = match['registration']?['text']?.toString() ?? match['registration_text']?.toString() ?? match['raw']?['registration_text']?.toString() ?? '';
     regText = regText.trim().toLowerCase();
     if (regText.startsWith('vanaf ')) {
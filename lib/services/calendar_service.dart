@@ -2,6 +2,7 @@ import 'dart:async';
 import 'package:flutter/material.dart';
 import 'package:flutter/cupertino.dart';
 import 'package:add_2_calendar/add_2_calendar.dart';
+import 'package:cloud_firestore/cloud_firestore.dart';
 import 'package:timezone/timezone.dart' as tz;
 import 'package:timezone/data/latest.dart' as tz;
 import 'package:intl/intl.dart';
@@ -258,10 +259,10 @@ class CalendarService {
         matchDate = _parseDate(dateStr);
       }
       
-      // Extract enrollment date
-      DateTime? enrollmentDate;
+      // Extract enrollment date (stored by the scraper, parsed from the text for older documents)
+      DateTime? enrollmentDate = _storedEnrollmentDate(match['registration_opens_at']);
       final regText = (match['registration_text'] ?? match['raw']?['registration_text'] ?? '').toString().toLowerCase();
-      if (regText.startsWith('vanaf ')) {
+      if (enrollmentDate == null && regText.startsWith('vanaf ')) {
         enrollmentDate = _parseEnrollmentDate(regText);
       }
       
@@ -333,6 +334,14 @@ class CalendarService {
     }
   }
   
+  /// Registration opening stored by the scraper (Firestore Timestamp)
+  static DateTime? _storedEnrollmentDate(dynamic opensAt) {
+    if (opensAt is Timestamp) return opensAt.toDate();
+    if (opensAt is DateTime) return opensAt;
+    if (opensAt is String) return DateTime.tryParse(opensAt)?.toLocal();
+    return null;
+  }
+  
   /// Parse enrollment date from registration text
   static DateTime? _parseEnrollmentDate(String regText) {
     try {
@@ -1,3 +1,4 @@
+import 'dart:async';
 import 'package:firebase_auth/firebase_auth.dart';
 import 'package:cloud_firestore/cloud_firestore.dart';
 
@@ -17,6 +18,88 @@ class MatchService {
   static final FirebaseFirestore _firestore = FirebaseFirestore.instance;
   static final FirebaseAuth _auth = FirebaseAuth.instance;
 
+  /// Pointer to the match generation the scraper has published.
+  /// A scrape writes new matches under the next generation and flips this
+  /// pointer when the whole run has landed, so only published documents
+  /// are shown and a half-written run is never visible.
+  static DocumentReference<Map<String, dynamic>> get _generationDoc =>
+      _firestore.collection('match_generation').doc('current');
+
+  /// Whether a match document belongs to the published [generation]
+  static bool _isPublished(Map<String, dynamic> data, int? generation) {
+    if (generation == null) return true;
+    final written = data['generation'];
+    final retired = data['retired_generation'];
+    if (written is int && written > generation) return false;
+    if (retired is int && retired <= generation) return false;
+    return true;
+  }
+
+  /// The version of a match document shown under the published [generation].
+  /// An update is staged next to the current version and its fields replace
+  /// the current ones once its generation is published; fields the scraper
+  /// does not write (e.g. enrolledUsers) are kept.
+  static Map<String, dynamic> _publishedData(
+      Map<String, dynamic> data, int? generation) {
+    final staged = data['staged'];
+    final stagedGeneration = data['staged_generation'];
+    final published = Map<String, dynamic>.from(data)
+      ..remove('staged')
+      ..remove('staged_generation');
+    if (generation != null &&
+        staged is Map &&
+        stagedGeneration is int &&
+        stagedGeneration <= generation) {
+      published.addAll(Map<String, dynamic>.from(staged));
+    }
+    return published;
+  }
+
+  static List<Map<String, dynamic>> _publishedMatches(
+      QuerySnapshot<Map<String, dynamic>> snapshot, int? generation) {
+    return snapshot.docs
+        .where((doc) => _isPublished(doc.data(), generation))
+        .map((doc) => {
+              'id': doc.id,
+              ..._publishedData(doc.data(), generation),
+            })
+        .toList();
+  }
+
+  /// Published matches, re-emitted when the matches or the pointer change
+  static Stream<List<Map<String, dynamic>>> _publishedMatchesStream() {
+    late StreamController<List<Map<String, dynamic>>> controller;
+    StreamSubscription? generationSubscription;
+    StreamSubscription? matchesSubscription;
+    QuerySnapshot<Map<String, dynamic>>? lastSnapshot;
+    int? generation;
+    var generationLoaded = false;
+
+    void emit() {
+      if (lastSnapshot == null || !generationLoaded) return;
+      controller.add(_publishedMatches(lastSnapshot!, generation));
+    }
+
+    controller = StreamController<List<Map<String, dynamic>>>(
+      onListen: () {
+        generationSubscription = _generationDoc.snapshots().listen((doc) {
+          generation = doc.data()?['generation'] as int?;
+          generationLoaded = true;
+          emit();
+        }, onError: controller.addError);
+        matchesSubscription = _firestore.collection('matches').snapshots().listen((snapshot) {
+          lastSnapshot = snapshot;
+          emit();
+        }, onError: controller.addError);
+      },
+      onCancel: () async {
+        await generationSubscription?.cancel();
+        await matchesSubscription?.cancel();
+      },
+    );
+    return controller.stream;
+  }
+
   /// Fetch matches from Firestore (not API)
   static Future<List<Map<String, dynamic>>> fetchMatches() async {
     try {
@@ -27,21 +110,15 @@ class MatchService {
       }
 
       // Read directly from Firestore instead of API
+      final pointer = await _generationDoc.get();
       final snapshot = await _firestore.collection('matches').get();
       
-      if (snapshot.docs.isEmpty) {
+      final matches = _publishedMatches(snapshot, pointer.data()?['generation'] as int?);
+      if (matches.isEmpty) {
         print('📭 No matches found in Firestore');
         return [];
       }
 
-      final matches = snapshot.docs.map((doc) {
-        final data = doc.data();
-        return {
-          'id': doc.id,
-          ...data,
-        };
-      }).toList();
-
       print('✅ Successfully fetched ${matches.length} matches from Firestore');
       return matches;
       
@@ -65,20 +142,12 @@ class MatchService {
       }
 
       // Return a real-time stream from Firestore with data comparison
-      return _firestore.collection('matches').snapshots().map((snapshot) {
-        if (snapshot.docs.isEmpty) {
+      return _publishedMatchesStream().map((matches) {
+        if (matches.isEmpty) {
           print('📭 No matches found in Firestore stream');
           return [];
         }
 
-        final matches = snapshot.docs.map((doc) {
-          final data = doc.data();
-          return {
-            'id': doc.id,
-            ...data,
-          };
-        }).toList();
-
         // Generate hash of the data to check if it has actually changed
         final dataHash = _generateDataHash(matches);
         
@@ -3,6 +3,13 @@
 Test script to verify CAC/CACIT match type normalization
 """
 
+import os
+import sys
+
+# The match type rules live with the Cloud Function source
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cloud_function_deploy'))
+from match_types import classify_match_type
+
 def test_match_type_normalization():
     """Test the match type normalization logic"""
     
@@ -38,13 +45,32 @@ def test_match_type_normalization():
         {
             'input_type': 'SJP Speciale Jachthondenproef',
             'calendar_type': 'Jachthondenproef',
-            'expected_type': 'SJP Speciale Jachthondenproef',
+            'expected_type': 'SJP',
             'expected_remark': None
         },
         {
             'input_type': 'MAP Minimale Aanlegproef',
             'calendar_type': 'Jachthondenproef',
-            'expected_type': 'MAP Minimale Aanlegproef',
+            'expected_type': 'MAP',
+            'expected_remark': None
+        },
+        {
+            'input_type': 'Standaard Jachthonden proef',
+            'calendar_type': 'Jachthondenproef',
+            'expected_type': 'SJP',
+            'expected_remark': None
+        },
+        {
+            'input_type': 'Team Apporteer Proef',
+            'calendar_type': 'Jachthondenproef',
+            'expected_type': 'TAP',
+            'expected_remark': None
+        },
+        {
+            # Acronyms only match whole words ('tap' in 'Jachtapporteerproef')
+            'input_type': 'Jachtapporteerproef',
+            'calendar_type': 'Jachthondenproef',
+            'expected_type': 'Jachtapporteerproef',
             'expected_remark': None
         }
     ]
@@ -59,19 +85,7 @@ def test_match_type_normalization():
         match_type = test_case['input_type']
         calendar_type = test_case['calendar_type']
         
-        normalized_type = match_type
-        match_details = None
-        
-        if calendar_type == 'Veldwedstrijd':
-            # For Veldwedstrijd calendar, normalize CAC/CACIT to "Veldwedstrijd"
-            if match_type.upper().startswith('CACIT') or 'CACIT' in match_type.upper():
-                normalized_type = 'Veldwedstrijd'  
-                match_details = f"Internationale kwalificatie: {match_type}"
-            elif match_type.upper().startswith('CAC') or 'CAC' in match_type.upper():
-                normalized_type = 'Veldwedstrijd'
-                match_details = f"Kwalificatie: {match_type}"
-            else:
-                normalized_type = 'Veldwedstrijd'
+        normalized_type, match_details = classify_match_type(match_type, calendar_type)
         
         # Check results
         type_correct = normalized_type == test_case['expected_type']
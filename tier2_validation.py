@@ -5,6 +5,12 @@ Tier 2 validation: Ensure perfect field mapping and consistency across all 3 pro
 
 import re
 from collections import defaultdict
+import os
+import sys
+
+# The shared cell cleaner lives with the Cloud Function source
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cloud_function_deploy'))
+from cell_cleaner import clean_escaped_text
 
 def extract_tier2_data():
     """Extract and analyze Tier 2 data structure"""
@@ -51,21 +57,8 @@ def extract_tier2_data():
     return matches
 
 def clean_text(text):
-    """Clean text by removing escape characters and normalizing whitespace"""
-    if not text:
-        return ""
-    
-    # Remove escape characters
-    text = text.replace('\\', '')
-    # Remove unicode artifacts
-    text = re.sub(r'u00[a-fA-F0-9]{2}', '', text)
-    # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text)
-    # Remove common parsing artifacts
-    text = re.sub(r'Aanvang:.*$', '', text)
-    # Remove email artifacts
-    text = re.sub(r'\[email.*?protected\]', '', text)
-    return text.strip()
+    """Clean text by removing escape characters, start times and normalizing whitespace"""
+    return clean_escaped_text(text, drop_start_time=True)
 
 def validate_tier2_field_mapping():
     """Validate Tier 2 field mappings and identify any issues"""